@@ -10,10 +10,36 @@ This package provides simulated shell utilities, target triple parsing,
 and WSL2 synchronization functions.
 """
 
-from .commands import ShellCmd
-from .elf import ElfParser, modify_elf_file
-from .rmake import RsyncMake
-from .target import TargetParser
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .commands import ShellCmd
+    from .elf import ElfParser, modify_elf_file
+    from .rmake import RsyncMake
+    from .target import TargetParser
+
+# Exported names and their submodules, imported on first access so that the
+# `rmake` and `shlutil` entry points only load the modules they use.
+_LAZY_EXPORTS = {
+    'ShellCmd': 'commands',
+    'TargetParser': 'target',
+    'RsyncMake': 'rmake',
+    'ElfParser': 'elf',
+    'modify_elf_file': 'elf',
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import an exported name from its submodule on first access."""
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    import importlib
+
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = (
     'ShellCmd',
@@ -7,10 +7,12 @@
 """Simulated shell utilities for Makefile compatibility on Windows."""
 
 import glob
+import itertools
 import os
+import re
 import sys
 import time
-from typing import Any, Generator, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple, Union
 
 from .sys_utils import (
     HostTargetInfo,
@@ -20,6 +22,8 @@ from .sys_utils import (
     wsl2win_path,
 )
 
+_SLASHES_RE = re.compile(r'/{2,}')
+
 
 class ShellCmd:
     """Implement platform-independent shell commands."""
@@ -29,6 +33,23 @@ class ShellCmd:
     EINVAL: int = 8
     EINTERRUPT: int = 254
 
+    # Delegate `rm -r` of directory trees to the native `rm` command. Off on
+    # Windows, where `cmd /c rd` would expand `&`, `|` and `%VAR%` in paths.
+    FAST_RM: bool = sys.platform != 'win32'
+    # Block size of FTP uploads that can't use sendfile.
+    UPLOAD_BLOCKSIZE: int = 1024 * 1024
+    # Maps slashes and backslashes to os.sep in a single str.translate() pass.
+    OS_SEP_TABLE: Dict[int, int] = str.maketrans('/\\', os.sep * 2)
+    # Predefined registry root keys accepted by `winreg`.
+    WINREG_ROOT_KEYS: Tuple[str, ...] = (
+        'HKEY_CLASSES_ROOT',
+        'HKEY_CURRENT_USER',
+        'HKEY_LOCAL_MACHINE',
+        'HKEY_USERS',
+        'HKEY_PERFORMANCE_DATA',
+        'HKEY_CURRENT_CONFIG',
+    )
+
     def __init__(self, *, cli_mode: bool = False) -> None:
         self.cli_mode: bool = cli_mode
 
@@ -62,6 +83,8 @@ class ShellCmd:
         recursive: bool = False,
         force: bool = False,
         args_from_stdin: bool = False,
+        jobs: int = 0,
+        background: bool = False,
     ) -> int:
         """Simulate rm / rm -rf.
 
@@ -72,66 +95,57 @@ class ShellCmd:
             if args_from_stdin:
                 import shlex
 
-                while True:
-                    try:
-                        line = input()
-                        lexer = shlex.shlex(line, posix=True)
-                        lexer.whitespace_split = True
-                        for arg in lexer:
-                            yield arg
-                    except EOFError:
-                        break
+                # Buffered line reads; input() flushes stdout on every call.
+                for line in sys.stdin:
+                    lexer = shlex.shlex(line, posix=True)
+                    lexer.whitespace_split = True
+                    yield from lexer
             else:
                 for arg in paths:
                     yield arg
 
-        status = 0
-        if not recursive:
-            for pattern in read_arg():
-                files = glob.glob(pattern)
-                if not files and not force:
-                    return self.check(
-                        self.EFAIL, OSError(f'Can not find file {pattern}')
-                    )
-                for file in files:
-                    try:
-                        if os.path.isfile(file) or os.path.islink(file):
-                            os.remove(file)
-                        elif os.path.isdir(file):
-                            os.rmdir(file)
-                        else:
-                            # On Windows, a link like a bad <JUNCTION> can't be accessed.
-                            os.remove(file)
-                    except OSError:
-                        status = self.EFAIL
-                        if force:
-                            continue
-                        return self.check(
-                            status, OSError(f'Can not remove file {file}')
-                        )
-        else:
-            for pattern in read_arg():
-                files = glob.glob(pattern)
-                if not files and not force:
-                    return self.check(
-                        self.EFAIL, OSError(f'Can not find file {pattern}')
-                    )
-                for file in files:
+        def remove(file: str) -> int:
+            try:
+                if self._is_real_dir(file):
+                    if recursive:
+                        self._rmtree_try_chmod(file)
+                    else:
+                        os.rmdir(file)
+                else:
+                    # Files, symlinks and junctions; on Windows, a link like a bad
+                    # <JUNCTION> can't be accessed.
                     try:
-                        if os.path.isfile(file) or os.path.islink(file):
-                            os.remove(file)
-                        elif os.path.isdir(file):
-                            self._rmtree_try_chmod(file)
-                        else:
-                            # On Windows, a link like a bad <JUNCTION> can't be accessed.
-                            os.remove(file)
-                    except OSError:
-                        status = self.EFAIL
-                        if force:
-                            continue
-                        return self.check(
-                            status, OSError(f'Can not remove tree {file}')
-                        )
+                        os.remove(file)
+                    except FileNotFoundError:
+                        # Already removed by the native command.
+                        if not recursive:
+                            raise
+            except OSError:
+                if force:
+                    return self.EFAIL
+                return self.check(
+                    self.EFAIL,
+                    OSError(f'Can not remove {"tree" if recursive else "file"} {file}'),
+                )
+            return 0
+
+        status = 0
+        for pattern in read_arg():
+            files = self._glob(pattern)
+            if not files and not force:
+                return self.check(self.EFAIL, OSError(f'Can not find file {pattern}'))
+            if recursive and (self.FAST_RM or background):
+                dirs = [file for file in files if self._is_real_dir(file)]
+                if background:
+                    dirs = self._rmtree_detached(dirs)
+                if self.FAST_RM:
+                    # Remove all matched directory trees with one native process.
+                    self._rmtree_native(dirs)
+            ret = self._for_each_file(remove, files, jobs, keep_going=force)
+            if ret != 0:
+                status = ret
+                if not force:
+                    return status
         return status
 
     def mkdir(
@@ -143,31 +157,21 @@ class ShellCmd:
 
         Creates directory paths. Always acts like Unix `mkdir -p` (creates parent directories, ignores existing paths).
         """
-        status = 0
-        for path in paths:
-            ok = False
-            for _ in range(100):
-                try:
-                    if not os.path.isdir(path):
-                        os.makedirs(path, exist_ok=True)
-                    ok = True
-                except OSError as e:
-                    import errno
-
-                    if e.errno == errno.EEXIST:
-                        if os.path.isdir(path):
-                            ok = True
-                            break
-                        else:
-                            time.sleep(0.001)
-                            continue
-                break
-            if not ok:
-                status = self.EFAIL
+
+        def make_dir(path: str) -> int:
+            try:
+                # A single stat for the common case of an existing directory.
+                if not os.path.isdir(path):
+                    os.makedirs(path, exist_ok=True)
+            except OSError:
                 if ignore_errors:
-                    continue
-                return self.check(status, OSError(f'Can not make directory "{path}"'))
-        return status
+                    return self.EFAIL
+                return self.check(
+                    self.EFAIL, OSError(f'Can not make directory "{path}"')
+                )
+            return 0
+
+        return self._for_each_file(make_dir, list(paths), keep_going=ignore_errors)
 
     def rmdir(
         self,
@@ -195,19 +199,13 @@ class ShellCmd:
                 # If path is a directory, keep the original logic of "downward recursion" to
                 # clean up empty subdirectories.
                 if os.path.isdir(path):
-
-                    def remove_parents_recur(p: str) -> None:
-                        try:
-                            for item in os.listdir(p):
-                                directory = os.path.join(p, item)
-                                if os.path.isdir(directory):
-                                    remove_parents_recur(directory)
-                                    if not os.listdir(directory):
-                                        os.rmdir(directory)
-                        except OSError:
-                            pass
-
-                    remove_parents_recur(path)
+                    # Bottom-up, so children are gone before their parents are tried.
+                    for root, _dirs, files in os.walk(path, topdown=False):
+                        if not files:
+                            try:
+                                os.rmdir(root)
+                            except OSError:
+                                pass
 
                 curr: str = os.path.normpath(path)
                 while curr:
@@ -232,6 +230,7 @@ class ShellCmd:
         dest: str,
         force: bool = False,
         ignore_errors: bool = False,
+        jobs: int = 0,
     ) -> int:
         """Simulate mv.
 
@@ -239,16 +238,18 @@ class ShellCmd:
         """
         import shutil
 
-        status = 0
-        files: List[str] = []
-        for pattern in sources:
-            files += glob.glob(pattern)
-        if len(files) > 1 and not os.path.isdir(dest):
+        # The matches are needed as a list for the thread pool anyway.
+        files = [file for pattern in sources for file in self._glob(pattern)]
+        dest_is_dir = os.path.isdir(dest)
+        if len(files) > 1 and not dest_is_dir:
             return self.check(
                 self.EFAIL,
                 ValueError(f'{dest} is not a directory'),
                 silence=ignore_errors,
             )
+        # Same-named sources would race on one destination in the thread pool.
+        if self._check_unique_basenames(files, dest, silence=ignore_errors) != 0:
+            return self.EFAIL
         if not files:
             if not ignore_errors:
                 self.check(
@@ -258,16 +259,16 @@ class ShellCmd:
                 )
             return 0
 
-        for file in files:
-            if os.path.isdir(dest) or dest.endswith((os.sep, '/')):
+        def move(file: str) -> int:
+            if dest_is_dir or dest.endswith((os.sep, '/')):
                 dest_path = os.path.join(dest, os.path.basename(file))
             else:
                 dest_path = dest
 
             if (
-                os.path.isdir(file)
-                and not os.path.isdir(dest)
+                not dest_is_dir
                 and not dest.endswith((os.sep, '/'))
+                and os.path.isdir(file)
             ):
                 parent_dir = os.path.dirname(dest_path)
                 if parent_dir and not os.path.exists(parent_dir):
@@ -292,7 +293,7 @@ class ShellCmd:
 
             if force and os.path.lexists(dest_path):
                 try:
-                    if os.path.isdir(dest_path) and not os.path.islink(dest_path):
+                    if self._is_real_dir(dest_path):
                         self._rmtree_try_chmod(dest_path)
                     else:
                         if not os.access(dest_path, os.W_OK):
@@ -304,14 +305,26 @@ class ShellCmd:
                     pass
 
             try:
-                shutil.move(file, dest_path)
+                # A plain rename within one file system; shutil.move() handles
+                # moves across file systems and into existing directories.
+                moved = False
+                if not os.path.isdir(dest_path):
+                    try:
+                        os.replace(file, dest_path)
+                        moved = True
+                    except OSError:
+                        pass
+                if not moved:
+                    shutil.move(file, dest_path)
             except OSError:
                 return self.check(
                     self.EFAIL,
                     OSError(f'Can not move {file} to {dest}'),
                     silence=ignore_errors,
                 )
-        return status
+            return 0
+
+        return self._for_each_file(move, files, jobs)
 
     def cp(
         self,
@@ -321,34 +334,40 @@ class ShellCmd:
         follow_symlinks: bool = True,
         force: bool = False,
         ignore_errors: bool = False,
+        jobs: int = 0,
     ) -> int:
         """Simulate cp.
 
         Copies files, directories, or glob patterns to a destination path.
         """
-        import shutil
+        import stat
 
         def copy_file(src: str, dst: str) -> None:
-            if os.path.islink(src) and not follow_symlinks:
+            # No link probe at all unless links are to be preserved.
+            if not follow_symlinks and os.path.islink(src):
                 if os.path.isdir(dst):
                     dst = os.path.join(dst, os.path.basename(src))
-                if os.path.lexists(dst):
+                try:
                     os.unlink(dst)
+                except FileNotFoundError:
+                    pass
                 linkto = os.readlink(src)
                 os.symlink(linkto, dst)
             else:
-                shutil.copy2(src, dst)
+                self._copy_file(src, dst)
 
-        status = 0
-        files: List[str] = []
-        for pattern in sources:
-            files += glob.glob(pattern)
-        if len(files) > 1 and not os.path.isdir(dest):
+        # The matches are needed as a list for the thread pool anyway.
+        files = [file for pattern in sources for file in self._glob(pattern)]
+        dest_is_dir = os.path.isdir(dest)
+        if len(files) > 1 and not dest_is_dir:
             return self.check(
                 self.EFAIL,
                 ValueError(f'{dest} is not a directory'),
                 silence=ignore_errors,
             )
+        # Same-named sources would race on one destination in the thread pool.
+        if self._check_unique_basenames(files, dest, silence=ignore_errors) != 0:
+            return self.EFAIL
         if not files:
             if not ignore_errors:
                 self.check(
@@ -358,8 +377,8 @@ class ShellCmd:
                 )
             return 0
 
-        for file in files:
-            if os.path.isdir(dest) or dest.endswith((os.sep, '/')):
+        def copy(file: str) -> int:
+            if dest_is_dir or dest.endswith((os.sep, '/')):
                 dest_path = os.path.join(dest, os.path.basename(file))
             else:
                 dest_path = dest
@@ -379,19 +398,26 @@ class ShellCmd:
 
             if force and os.path.lexists(dest_path):
                 try:
-                    if os.path.isdir(dest_path) and not os.path.islink(dest_path):
+                    if self._is_real_dir(dest_path):
                         self._rmtree_try_chmod(dest_path)
                     else:
                         if not os.access(dest_path, os.W_OK):
-                            import stat
-
                             os.chmod(dest_path, stat.S_IWUSR)
                         os.remove(dest_path)
                 except OSError:
                     pass
 
-            is_dir = os.path.isdir(file)
-            is_link = os.path.islink(file)
+            # One lstat per entry, plus a stat only for symlinks.
+            is_link = False
+            try:
+                st = os.lstat(file)
+                if stat.S_ISLNK(st.st_mode):
+                    is_link = True
+                    st = os.stat(file)
+            except OSError:
+                if not is_link:
+                    return 0
+            is_dir = stat.S_ISDIR(st.st_mode)
             if is_dir and not recursive:
                 return self.check(
                     self.EFAIL,
@@ -400,14 +426,15 @@ class ShellCmd:
                 )
 
             try:
-                if is_link or os.path.isfile(file):
+                if is_link or stat.S_ISREG(st.st_mode):
                     copy_file(file, dest_path)
                 elif is_dir and recursive:
-                    shutil.copytree(
+                    # Only a single tree gets its own pool of copy threads.
+                    self._copytree(
                         file,
                         dest_path,
-                        copy_function=copy_file,
-                        dirs_exist_ok=True,
+                        copy_file,
+                        jobs=jobs if len(files) == 1 else 1,
                     )
             except OSError:
                 return self.check(
@@ -415,7 +442,9 @@ class ShellCmd:
                     OSError(f'Can not copy {file} to {dest}'),
                     silence=ignore_errors,
                 )
-        return status
+            return 0
+
+        return self._for_each_file(copy, files, jobs)
 
     def mklink(
         self,
@@ -451,7 +480,7 @@ class ShellCmd:
 
         if force and os.path.lexists(link):
             try:
-                if os.path.isdir(link) and not os.path.islink(link):
+                if self._is_real_dir(link):
                     self._rmtree_try_chmod(link)
                 else:
                     if not os.access(link, os.W_OK):
@@ -463,7 +492,7 @@ class ShellCmd:
                 pass
 
         try:
-            target = target.replace('/', os.sep).replace('\\', os.sep)
+            target = target.translate(self.OS_SEP_TABLE)
             os.symlink(
                 target,
                 link,
@@ -481,36 +510,47 @@ class ShellCmd:
         """Fix Windows/WSL broken symbolic links."""
         is_wsl = 'WSL_DISTRO_NAME' in os.environ
 
-        def walk(pattern: str) -> None:
-            for file in glob.glob(pattern):
+        def walk(file: str, entry: Optional['os.DirEntry[str]'] = None) -> None:
+            # Directory entries carry a cached file type, so most checks need no stat.
+            try:
                 try:
-                    if os.path.isdir(file):
-                        walk(os.path.join(file, '*'))
-                        continue
-                    is_link = os.path.islink(file)
-                    if is_link and is_wsl:
-                        # On WSL Linux, rebuild all file links.
-                        target = os.readlink(file)
-                        os.unlink(file)
-                        os.symlink(target, file)
-                    elif not is_link and not os.path.isfile(file):
-                        # On Windows, a link like a bad <JUNCTION> can't be accessed.
-                        # Try to find its target and rebuild it.
-                        for target in glob.glob(os.path.splitext(file)[0] + '.*'):
-                            if os.path.isfile(target) and not os.path.islink(target):
-                                os.unlink(file)
-                                os.symlink(os.path.basename(target), file)
-                                break
+                    is_dir = entry.is_dir() if entry else os.path.isdir(file)
                 except OSError:
-                    print(
-                        f'Can not fix the bad symbolic link {file}',
-                        file=sys.stderr,
-                    )
-                    raise
+                    is_dir = False
+                if is_dir:
+                    with os.scandir(file) as it:
+                        # Skip hidden entries like the '*' glob used to.
+                        children = [x for x in it if not x.name.startswith('.')]
+                    for child in children:
+                        walk(child.path, child)
+                    return
+                is_link = entry.is_symlink() if entry else os.path.islink(file)
+                if is_link and is_wsl:
+                    # On WSL Linux, rebuild all file links.
+                    target = os.readlink(file)
+                    os.unlink(file)
+                    os.symlink(target, file)
+                elif not is_link and not (
+                    entry.is_file() if entry else os.path.isfile(file)
+                ):
+                    # On Windows, a link like a bad <JUNCTION> can't be accessed.
+                    # Try to find its target and rebuild it.
+                    for target in glob.glob(os.path.splitext(file)[0] + '.*'):
+                        if os.path.isfile(target) and not os.path.islink(target):
+                            os.unlink(file)
+                            os.symlink(os.path.basename(target), file)
+                            break
+            except OSError:
+                print(
+                    f'Can not fix the bad symbolic link {file}',
+                    file=sys.stderr,
+                )
+                raise
 
         try:
             for pattern in patterns:
-                walk(pattern)
+                for file in self._glob(pattern):
+                    walk(file)
             return 0
         except OSError as e:
             return self.check(self.EFAIL, e, rethrow=True)
@@ -569,20 +609,18 @@ class ShellCmd:
         ignore_errors: bool = False,
     ) -> int:
         """Simulate touch."""
+        flags = os.O_WRONLY | os.O_CREAT | getattr(os, 'O_NOCTTY', 0)
         status = 0
         for pattern in paths:
-            files = glob.glob(pattern)
-            if not files:
-                try:
-                    open(pattern, 'ab').close()
-                except OSError:
-                    status = self.EFAIL
-                    if ignore_errors:
-                        continue
-                    return self.check(status, OSError(f'Can not create file {pattern}'))
-            for file in files:
+            # A literal path is created on demand instead of probed beforehand.
+            files = glob.glob(pattern) if glob.has_magic(pattern) else []
+            for file in files or [pattern]:
                 try:
-                    os.utime(file, None)
+                    try:
+                        # `None` keeps the kernel's "now", which needs only write access.
+                        os.utime(file, None)
+                    except FileNotFoundError:
+                        os.close(os.open(file, flags, 0o666))
                 except OSError:
                     status = self.EFAIL
                     if ignore_errors:
@@ -599,12 +637,11 @@ class ShellCmd:
 
         Equivalent to: sed -i 's/old/new/g' <file>
         """
-        import re
 
         status = 0
         expanded_paths = []
         for pattern in paths:
-            files = glob.glob(pattern)
+            files = self._glob(pattern)
             if not files:
                 print(f'Warning: no files matched pattern {pattern}', file=sys.stderr)
             expanded_paths.extend(files)
@@ -643,8 +680,8 @@ class ShellCmd:
     def cmpver(self, v1: str, v2: str, *, force: bool = False) -> int:
         """Compare two version strings."""
         try:
-            parsed_v1 = [int(x) for x in (v1 + '.0.0.0').split('.')[:4]]
-            parsed_v2 = [int(x) for x in (v2 + '.0.0.0').split('.')[:4]]
+            parsed_v1 = self._parse_version(v1)
+            parsed_v2 = self._parse_version(v2)
             if parsed_v1 > parsed_v2:
                 result = (1, '+')
             elif parsed_v1 == parsed_v2:
@@ -657,6 +694,12 @@ class ShellCmd:
         print(result[1], end='')
         return 0 if force else result[0]
 
+    @staticmethod
+    def _parse_version(version: str) -> Tuple[int, ...]:
+        """Parse up to four dotted components, padding missing ones with 0."""
+        parts = version.split('.', 4)
+        return tuple(int(parts[i]) if i < len(parts) else 0 for i in range(4))
+
     def winreg(self, keys: List[str]) -> int:
         """Query registry value on Windows."""
         try:
@@ -664,19 +707,13 @@ class ShellCmd:
             try:
                 import winreg as _winreg
 
-                root_keys = {
-                    'HKEY_CLASSES_ROOT': _winreg.HKEY_CLASSES_ROOT,
-                    'HKEY_CURRENT_USER': _winreg.HKEY_CURRENT_USER,
-                    'HKEY_LOCAL_MACHINE': _winreg.HKEY_LOCAL_MACHINE,
-                    'HKEY_USERS': _winreg.HKEY_USERS,
-                    'HKEY_PERFORMANCE_DATA': _winreg.HKEY_PERFORMANCE_DATA,
-                    'HKEY_CURRENT_CONFIG': _winreg.HKEY_CURRENT_CONFIG,
-                }
                 for arg in keys:
-                    keys_split = arg.split('\\')
-                    key = root_keys[keys_split[0]]
-                    sub_key = '\\'.join(keys_split[1:-1])
-                    value_name = keys_split[-1]
+                    # ROOT\SUB\KEY\NAME -> ('ROOT', 'SUB\KEY', 'NAME')
+                    path, _, value_name = arg.rpartition('\\')
+                    root_name, _, sub_key = path.partition('\\')
+                    if root_name not in self.WINREG_ROOT_KEYS:
+                        continue
+                    key = getattr(_winreg, root_name)
                     try:
                         with _winreg.OpenKey(
                             key, sub_key, 0, _winreg.KEY_READ | _winreg.KEY_WOW64_64KEY
@@ -711,20 +748,18 @@ class ShellCmd:
             if cargo_toml_path.endswith('.toml')
             else os.path.join(cargo_toml_path, 'Cargo.toml')
         )
-        cargo_toml = (
-            os.path.join(ws_dir, cfg_file)
-            if os.path.isfile(os.path.join(ws_dir, cfg_file))
-            else cfg_file
-        )
+        cargo_toml = os.path.join(ws_dir, cfg_file)
+        if not os.path.isfile(cargo_toml):
+            cargo_toml = cfg_file
         try:
-            import toml
+            # The C-accelerated standard parser on Python 3.11+.
+            import tomllib
 
-            cargo = toml.load(cargo_toml)
+            with open(cargo_toml, mode='rb') as fp:
+                cargo = tomllib.load(fp)
         except ImportError:
             try:
-                tomllib = __import__('tomllib')
-                with open(cargo_toml, mode='rb') as fp:
-                    cargo = tomllib.load(fp)
+                import toml
             except ImportError:
                 return self.check(
                     self.EFAIL,
@@ -732,18 +767,40 @@ class ShellCmd:
                         'toml is not installed. Please execute: pip install toml'
                     ),
                 )
+            cargo = toml.load(cargo_toml)
         package = cargo['package']
         os.environ['CARGO_CRATE_NAME'] = package['name']
         os.environ['CARGO_PKG_NAME'] = package['name']
         os.environ['CARGO_PKG_VERSION'] = package['version']
         os.environ['CARGO_MAKE_TIMESTAMP'] = f'{time.time()}'
-        if self.cli_mode:
-            return subprocess.call(' '.join(command), shell=True)
-        else:
-            return subprocess.check_call(' '.join(command), shell=True)
+        run = subprocess.call if self.cli_mode else subprocess.check_call
+        if self._needs_shell(command):
+            return run(' '.join(command), shell=True)
+        return run(command)
+
+    @staticmethod
+    def _needs_shell(command: List[str]) -> bool:
+        """Check if a command must go through the shell rather than be executed."""
+        import shutil
 
-    def upload(self, ftp_path: str, files: List[str]) -> int:
+        if sys.platform == 'win32' or not command:
+            # Keep cmd.exe for builtins and batch files.
+            return True
+        if shutil.which(command[0]) is None:
+            # A shell builtin, or a single argument holding a whole command line.
+            return True
+        # Anything the shell would expand, split or redirect.
+        return any(c in arg for arg in command for c in ' \t\n|&;<>()$`\\"\'*?[#~')
+
+    def upload(
+        self,
+        ftp_path: str,
+        files: List[str],
+        verbose: bool = False,
+        jobs: int = 1,
+    ) -> int:
         """Upload file via FTP or SFTP."""
+        import threading
         import urllib.parse
 
         parsed = urllib.parse.urlparse(ftp_path)
@@ -757,18 +814,8 @@ class ShellCmd:
         password = parsed.password or ''
         remote_dir = parsed.path or '/'
 
-        ftp = None
-        ssh = None
-        sftp = None
         if scheme in ['ftp', 'ftps']:
             import ftplib
-
-            ftp = ftplib.FTP()
-            ftp.connect(hostname, port or 21)
-            ftp.login(username, password)
-            if scheme == 'ftps':
-                ftp.prot_p()  # pyright: ignore[reportAttributeAccessIssue]
-            ftp.set_pasv(True)
         elif scheme == 'sftp':
             try:
                 import paramiko
@@ -779,19 +826,72 @@ class ShellCmd:
                         'paramiko is not installed. Please execute: pip install paramiko'
                     ),
                 )
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(hostname, port or 22, username, password)
-            sftp = ssh.open_sftp()
         else:
             return self.check(
                 self.EINVAL,
                 ValueError(f'Unsupported protocol: {scheme}'),
             )
 
+        # One (ftp, ssh, sftp) session per worker thread.
+        sessions: List[Tuple[Any, Any, Any]] = []
+        lock = threading.Lock()
+        local = threading.local()
+
+        def session() -> Tuple[Any, Any, Any]:
+            conn = getattr(local, 'conn', None)
+            if conn is None:
+                ftp = None
+                ssh = None
+                sftp = None
+                if scheme == 'sftp':
+                    ssh = paramiko.SSHClient()
+                    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+                    ssh.connect(hostname, port or 22, username, password)
+                    sftp = ssh.open_sftp()
+                else:
+                    ftp = ftplib.FTP()
+                    ftp.connect(hostname, port or 21)
+                    ftp.login(username, password)
+                    if scheme == 'ftps':
+                        ftp.prot_p()  # pyright: ignore[reportAttributeAccessIssue]
+                    ftp.set_pasv(True)
+                conn = local.conn = (ftp, ssh, sftp)
+                with lock:
+                    sessions.append(conn)
+            return conn
+
+        # socket.sendfile() only uses sendfile(2) on POSIX and plain sockets.
+        use_sendfile = scheme == 'ftp' and sys.platform != 'win32'
+
+        def transfer(local_path: str, remote_path: str) -> None:
+            ftp, _ssh, sftp = session()
+            if ftp is not None and not verbose and use_sendfile:
+                # Zero-copy transfer over the data connection.
+                with open(local_path, 'rb') as fp:
+                    ftp.voidcmd('TYPE I')
+                    with ftp.transfercmd(f'STOR {remote_path}') as conn:
+                        conn.sendfile(fp)
+                    ftp.voidresp()
+            elif ftp is not None:
+                # Large blocks, with per-block progress only on request.
+                with open(local_path, 'rb') as fp:
+                    ftp.storbinary(
+                        f'STOR {remote_path}',
+                        fp,
+                        self.UPLOAD_BLOCKSIZE,
+                        callback=(
+                            (lambda _sent: print('.', end='', flush=True))
+                            if verbose
+                            else None
+                        ),
+                    )
+            elif sftp is not None:
+                sftp.put(local_path, remote_path)
+
+        pairs: List[Tuple[str, str]] = []
         for item in files:
             pair = item.split('=')
-            for local_path in glob.glob(pair[-1]):
+            for local_path in self._glob(pair[-1]):
                 if not os.path.isdir(local_path):
                     remote_path = (
                         os.path.basename(local_path) if len(pair) == 1 else pair[0]
@@ -802,34 +902,41 @@ class ShellCmd:
                         remote_path = '/'.join(
                             [remote_path, os.path.basename(local_path)]
                         )
-                    while '//' in remote_path:
-                        remote_path = remote_path.replace('//', '/')
+                    remote_path = _SLASHES_RE.sub('/', remote_path)
+                    pairs.append((local_path, remote_path))
 
+        try:
+            if jobs <= 1 or len(pairs) <= 1:
+                for local_path, remote_path in pairs:
                     print(f'Upload "{local_path}"')
                     print(
                         f'    to "{url}{remote_path}" ...',
                         end='',
                         flush=True,
                     )
-                    if ftp is not None:
-                        with open(local_path, 'rb') as fp:
-                            ftp.storbinary(
-                                f'STOR {remote_path}',
-                                fp,
-                                32 * 1024,
-                                callback=lambda _sent: print('.', end='', flush=True),
-                            )
-                    elif sftp is not None:
-                        sftp.put(local_path, remote_path)
-                    print('')
-        print('Done.', flush=True)
-
-        if ftp is not None:
-            ftp.quit()
-        if sftp is not None:
-            sftp.close()
-        if ssh is not None:
-            ssh.close()
+                    transfer(local_path, remote_path)
+                    print(' done')
+            else:
+                from concurrent.futures import ThreadPoolExecutor
+
+                # Overlap the per-file round trips; report each file when it is done.
+                def upload_one(pair: Tuple[str, str]) -> None:
+                    transfer(*pair)
+                    with lock:
+                        print(f'Upload "{pair[0]}"')
+                        print(f'    to "{url}{pair[1]}" ... done', flush=True)
+
+                with ThreadPoolExecutor(max_workers=min(jobs, len(pairs))) as executor:
+                    list(executor.map(upload_one, pairs))
+            print('Done.', flush=True)
+        finally:
+            for ftp, ssh, sftp in sessions:
+                if ftp is not None:
+                    ftp.quit()
+                if sftp is not None:
+                    sftp.close()
+                if ssh is not None:
+                    ssh.close()
         return 0
 
     def build_target_deps(self, params: List[str]) -> int:
@@ -1098,29 +1205,50 @@ class ShellCmd:
 
     def elf_path_fixer(
         self,
-        elf_file: str,
+        *elf_files: str,
+        elf_file: Optional[str] = None,
         targets: List[str],
-        *,
         fix_rpath: bool = False,
         create_backup: bool = True,
         verbose: bool = False,
         quiet: bool = False,
     ) -> int:
-        """Fix ELF dynamic library paths by removing directory paths."""
+        """Fix ELF dynamic library paths by removing directory paths.
+
+        `elf_file` is a deprecated alias of a single positional file.
+        """
+        import struct
+        import warnings
+
         from .elf import modify_elf_file
 
-        try:
-            success = modify_elf_file(
-                elf_file,
-                targets,
-                fix_rpath=fix_rpath,
-                create_backup=create_backup,
-                verbose=verbose,
-                quiet=quiet,
+        if elf_file is not None:
+            warnings.warn(
+                'elf_path_fixer(elf_file=...) is deprecated, '
+                'pass the files as positional arguments',
+                DeprecationWarning,
+                stacklevel=2,
             )
-            return 0 if success else self.EFAIL
-        except Exception as e:
-            return self.check(self.EFAIL, f'[ERROR] Failed to modify ELF file: {e}')
+            elf_files = (elf_file, *elf_files)
+        # One process handles the whole batch, so the compiled patterns are reused.
+        for elf_file in elf_files:
+            try:
+                success = modify_elf_file(
+                    elf_file,
+                    targets,
+                    fix_rpath=fix_rpath,
+                    create_backup=create_backup,
+                    verbose=verbose,
+                    quiet=quiet,
+                )
+                if not success:
+                    return self.EFAIL
+            except (ValueError, struct.error) as e:
+                # `ElfParser` validates the magic number and the table bounds.
+                return self.check(self.EFAIL, f'[ERROR] {elf_file}: {e}')
+            except Exception as e:
+                return self.check(self.EFAIL, f'[ERROR] Failed to modify ELF file: {e}')
+        return 0
 
     def clone_libs(
         self,
@@ -1156,11 +1284,7 @@ class ShellCmd:
 
         if rebuild is not None:
             print(f"Rebuilding in local repository '{local_repo}'...")
-            ret = subprocess.call(
-                ' '.join(filter(None, ['make', rebuild, 'DEBUG=0'])),
-                shell=True,
-                cwd=local_repo,
-            )
+            ret = subprocess.call(['make', *rebuild.split(), 'DEBUG=0'], cwd=local_repo)
             if ret != 0:
                 return self.check(
                     self.EFAIL,
@@ -1176,7 +1300,7 @@ class ShellCmd:
         else:
             print(f"Cloning from '{url}' to '{tmp_dir}'...")
             ret = subprocess.call(
-                f'git clone --depth 1 --branch master "{url}" "{tmp_dir}"', shell=True
+                ['git', 'clone', '--depth', '1', '--branch', 'master', url, tmp_dir]
             )
             if ret != 0:
                 return self.check(
@@ -1378,20 +1502,330 @@ class ShellCmd:
                 ValueError(f'Error: Unrecognized tar command "{tar_command}"'),
             )
 
-    @classmethod
-    def _rmtree_try_chmod(cls, path: str, *, ignore_errors=False):
+    def _for_each_file(
+        self,
+        func: Callable[[str], int],
+        files: List[str],
+        jobs: int = 0,
+        *,
+        keep_going: bool = False,
+    ) -> int:
+        """Apply `func` to every file, using a thread pool for large batches."""
+        if jobs <= 0:
+            jobs = min(32, (os.cpu_count() or 1) * 4) if len(files) > 8 else 1
+        if jobs <= 1 or len(files) <= 1:
+            status = 0
+            for file in files:
+                ret = func(file)
+                if ret != 0:
+                    status = ret
+                    if not keep_going:
+                        break
+            return status
+
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        status = 0
+        error: Optional[BaseException] = None
+        todo = iter(files)
+        with ThreadPoolExecutor(max_workers=min(jobs, len(files))) as executor:
+            # Keep only `jobs` files in flight, so that nothing new is started
+            # once a failure is seen.
+            running = {
+                executor.submit(func, file) for file in itertools.islice(todo, jobs)
+            }
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                    elif future.result() != 0 and status == 0:
+                        status = future.result()
+                if error is None and (status == 0 or keep_going):
+                    running |= {
+                        executor.submit(func, file)
+                        for file in itertools.islice(todo, len(done))
+                    }
+        if error is not None:
+            raise error
+        return status
+
+    def _check_unique_basenames(
+        self, files: List[str], dest: str, *, silence: bool = False
+    ) -> int:
+        """Refuse to put two sources with the same name into one directory."""
+        seen: Dict[str, str] = {}
+        for file in files:
+            name = os.path.basename(os.path.normpath(file))
+            if name in seen:
+                return self.check(
+                    self.EFAIL,
+                    ValueError(
+                        f'"{seen[name]}" and "{file}" would both be written to '
+                        f'{os.path.join(dest, name)}'
+                    ),
+                    silence=silence,
+                )
+            seen[name] = file
+        return 0
+
+    def _copytree(
+        self,
+        src: str,
+        dst: str,
+        copy_function: Callable[[str, str], None],
+        jobs: int = 0,
+    ) -> None:
+        """Copy a tree like `shutil.copytree(..., dirs_exist_ok=True)`.
+
+        The directories are created first, then the files are copied in a thread
+        pool, and finally the directory metadata is copied bottom-up.
+        """
+        import shutil
+
+        dirs: List[Tuple[str, str]] = []
+        pending: Dict[str, str] = {}
+        errors: List[Tuple[str, str, str]] = []
+
+        stack = [(src, dst)]
+        while stack:
+            src_dir, dst_dir = stack.pop()
+            try:
+                os.makedirs(dst_dir, exist_ok=True)
+                with os.scandir(src_dir) as it:
+                    entries = list(it)
+            except OSError as e:
+                errors.append((src_dir, dst_dir, str(e)))
+                continue
+            dirs.append((src_dir, dst_dir))
+            for entry in entries:
+                dst_path = os.path.join(dst_dir, entry.name)
+                # Like copytree(symlinks=False), links to directories are followed.
+                if entry.is_dir():
+                    stack.append((entry.path, dst_path))
+                else:
+                    pending[dst_path] = entry.path
+
+        def copy(dst_path: str) -> int:
+            try:
+                copy_function(pending[dst_path], dst_path)
+            except OSError as e:
+                errors.append((pending[dst_path], dst_path, str(e)))
+            return 0
+
+        self._for_each_file(copy, list(pending), jobs)
+
+        for src_dir, dst_dir in reversed(dirs):
+            try:
+                shutil.copystat(src_dir, dst_dir)
+            except OSError as e:
+                # Windows can't copy some directory times, as in copytree().
+                if getattr(e, 'winerror', None) is None:
+                    errors.append((src_dir, dst_dir, str(e)))
+        if errors:
+            raise shutil.Error(errors)
+
+    @staticmethod
+    def _glob(pattern: str) -> List[str]:
+        """Expand a glob pattern, checking literal paths without a directory scan."""
+        if not glob.has_magic(pattern):
+            return [pattern] if os.path.lexists(pattern) else []
+        return glob.glob(pattern)
+
+    @staticmethod
+    def _is_real_dir(path: str) -> bool:
+        """Check with a single lstat that `path` is a directory, not a link."""
+        import stat
+
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return False
+        if sys.platform == 'win32' and (
+            st.st_file_attributes & stat.FILE_ATTRIBUTE_REPARSE_POINT
+        ):
+            return False
+        return stat.S_ISDIR(st.st_mode)
+
+    @staticmethod
+    def _copy_file(src: str, dst: str) -> None:
+        """Copy a file with its metadata like `shutil.copy2`.
+
+        `dst` is the destination file path, never a directory to copy into.
+        """
         import shutil
 
-        def onerror(func: Any, path: str, _exc_info: Any) -> None:
-            import stat
+        if sys.platform == 'win32':
+            if sys.version_info < (3, 12):
+                # shutil only uses the native CopyFile API since Python 3.12.
+                import ctypes
 
-            if not os.access(path, os.W_OK):
-                os.chmod(path, stat.S_IWUSR)
-                func(path)
+                if ctypes.windll.kernel32.CopyFileW(  # pyright: ignore
+                    os.path.abspath(src), os.path.abspath(dst), False
+                ):
+                    return
+            shutil.copy2(src, dst)
+        else:
+            # copy2() without its isdir(dst) probe.
+            copied = False
+            if hasattr(os, 'copy_file_range'):
+                # Linux: in-kernel copy, a reflink on copy-on-write file systems.
+                try:
+                    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                        while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30):
+                            pass
+                    copied = True
+                except OSError:
+                    # EXDEV on older kernels, special files, etc.
+                    pass
+            if copied:
+                shutil.copystat(src, dst)
             else:
-                raise
+                # shutil's own fast paths: fcopyfile on macOS, sendfile on Linux.
+                shutil.copy2(src, dst)
+
+    @classmethod
+    def _rmtree_detached(cls, paths: List[str]) -> List[str]:
+        """Move directory trees aside and remove them in a detached process.
+
+        Returns the paths that could not be moved aside; they must be removed
+        synchronously.
+        """
+        import subprocess
+
+        left: List[str] = []
+        moved: List[str] = []
+        for i, path in enumerate(paths):
+            # A rename within the parent directory frees the path at once.
+            parent, name = os.path.split(os.path.normpath(path))
+            trash = os.path.join(parent, f'.{name}.{os.getpid()}-{i}.deleting')
+            try:
+                os.rename(path, trash)
+                moved.append(trash)
+            except OSError:
+                left.append(path)
+        if not moved:
+            return left
 
-        shutil.rmtree(path, ignore_errors=ignore_errors, onerror=onerror)  # pyright: ignore[reportDeprecated]
+        try:
+            if sys.platform == 'win32':
+                # Run the Python tree walker; no shell ever parses the paths.
+                flags = getattr(subprocess, 'DETACHED_PROCESS', 0) | getattr(
+                    subprocess, 'CREATE_NEW_PROCESS_GROUP', 0
+                )
+                subprocess.Popen(
+                    [
+                        sys.executable,
+                        '-c',
+                        'import shutil, sys\n'
+                        'for p in sys.argv[1:]: shutil.rmtree(p, ignore_errors=True)',
+                        *moved,
+                    ],
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    creationflags=flags,
+                )
+            else:
+                subprocess.Popen(
+                    ['rm', '-rf', '--', *moved],
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    start_new_session=True,
+                )
+        except OSError:
+            # No native command to hand the trees to.
+            left += moved
+        return left
+
+    @classmethod
+    def _rmtree_native(cls, paths: List[str]) -> None:
+        """Remove directory trees with the native `rm` command, if any.
+
+        A no-op on Windows: `cmd /c rd` can't be given arbitrary paths safely.
+        """
+        import shutil
+        import subprocess
+
+        if not paths or sys.platform == 'win32':
+            return
+        rm = shutil.which('rm')
+        if not rm:
+            return
+        try:
+            subprocess.call(
+                [rm, '-rf', '--', *paths],
+                stdin=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            # Whatever remains is removed by the Python fallback.
+            pass
+
+    @classmethod
+    def _rmtree_try_chmod(cls, path: str, *, ignore_errors=False):
+        import stat
+
+        def make_writable(target: str) -> None:
+            # A read-only file blocks removal on Windows, a read-only parent
+            # directory blocks it on POSIX.
+            for p in (os.path.dirname(target), target):
+                try:
+                    st = os.lstat(p)
+                    if not stat.S_ISLNK(st.st_mode) and not os.access(p, os.W_OK):
+                        os.chmod(p, stat.S_IMODE(st.st_mode) | stat.S_IRWXU)
+                except OSError:
+                    pass
+
+        def call(func: Any, target: str) -> Any:
+            try:
+                try:
+                    return func(target)
+                except PermissionError:
+                    make_writable(target)
+                    return func(target)
+            except OSError:
+                if not ignore_errors:
+                    raise
+                return None
+
+        def is_real_dir(entry: 'os.DirEntry[str]') -> bool:
+            # Use the type cached in the directory entry instead of another stat.
+            try:
+                if not entry.is_dir(follow_symlinks=False):
+                    return False
+                if sys.platform == 'win32':
+                    # Junctions are unlinked like files, never followed.
+                    attrs = entry.stat(follow_symlinks=False).st_file_attributes
+                    return not attrs & stat.FILE_ATTRIBUTE_REPARSE_POINT
+                return True
+            except OSError:
+                return False
+
+        def scan(top: str) -> List['os.DirEntry[str]']:
+            def list_dir(top: str) -> List['os.DirEntry[str]']:
+                with os.scandir(top) as it:
+                    return list(it)
+
+            return call(list_dir, top) or []
+
+        if os.path.lexists(path) and not cls._is_real_dir(path):
+            if ignore_errors:
+                return
+            raise OSError(f'Cannot call rmtree on a symbolic link {path}')
+
+        stack = [(path, iter(scan(path)))]
+        while stack:
+            top, entries = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                stack.pop()
+                call(os.rmdir, top)
+            elif is_real_dir(entry):
+                stack.append((entry.path, iter(scan(entry.path))))
+            else:
+                call(os.unlink, entry.path)
 
     @classmethod
     def main(cls, args: Optional[List[str]] = None) -> int:
@@ -1411,6 +1845,12 @@ class ShellCmd:
             rm_parser.add_argument(
                 '-f', '--force', action='store_true', help='Force remove'
             )
+            rm_parser.add_argument(
+                '--async',
+                action='store_true',
+                dest='background',
+                help='Remove directory trees in a detached background process',
+            )
             rm_parser.add_argument(
                 '--stdin',
                 '--args-from-stdin',
@@ -1418,6 +1858,13 @@ class ShellCmd:
                 dest='args_from_stdin',
                 help='Read from stdin',
             )
+            rm_parser.add_argument(
+                '-j',
+                '--jobs',
+                type=int,
+                default=0,
+                help='Number of parallel jobs (default: auto)',
+            )
             rm_parser.add_argument(
                 'paths', nargs='*', help='Files or directories to remove'
             )
@@ -1464,6 +1911,13 @@ class ShellCmd:
             mv_parser.add_argument(
                 '--ignore-errors', action='store_true', help='Ignore errors'
             )
+            mv_parser.add_argument(
+                '-j',
+                '--jobs',
+                type=int,
+                default=0,
+                help='Number of parallel jobs (default: auto)',
+            )
             mv_parser.add_argument(
                 'paths', nargs='+', help='Source files and destination directory'
             )
@@ -1487,6 +1941,13 @@ class ShellCmd:
             cp_parser.add_argument(
                 '--ignore-errors', action='store_true', help='Ignore errors'
             )
+            cp_parser.add_argument(
+                '-j',
+                '--jobs',
+                type=int,
+                default=0,
+                help='Number of parallel jobs (default: auto)',
+            )
             cp_parser.add_argument(
                 'paths', nargs='+', help='Source files and destination directory'
             )
@@ -1606,6 +2067,19 @@ class ShellCmd:
             upload_parser = subparsers.add_parser(
                 'upload', help='Upload file via FTP or SFTP'
             )
+            upload_parser.add_argument(
+                '-v',
+                '--verbose',
+                action='store_true',
+                help='Print a dot for every transferred block',
+            )
+            upload_parser.add_argument(
+                '-j',
+                '--jobs',
+                type=int,
+                default=1,
+                help='Number of parallel upload sessions (default: 1)',
+            )
             upload_parser.add_argument('ftp_path', help='Remote FTP server URL')
             upload_parser.add_argument(
                 'files', nargs='+', help='File patterns to upload'
@@ -1696,7 +2170,9 @@ class ShellCmd:
                 help='Fix ELF dynamic library paths by removing directory paths',
             )
             elf_path_fixer_parser.add_argument(
-                'elf_file', help='Path to the ELF executable file to process'
+                'elf_files',
+                nargs='+',
+                help='Paths to the ELF executable files to process',
             )
             elf_path_fixer_parser.add_argument(
                 '--target',
@@ -1919,164 +2395,140 @@ class ShellCmd:
 
             cmd = namespace.command
 
-            if cmd == 'rm':
-                return inst.rm(
+            handlers: Dict[str, Callable[[], int]] = {
+                'rm': lambda: inst.rm(
                     *namespace.paths,
                     recursive=namespace.recursive,
                     force=namespace.force,
                     args_from_stdin=namespace.args_from_stdin,
-                )
-            elif cmd == 'mkdir':
-                return inst.mkdir(
+                    jobs=namespace.jobs,
+                    background=namespace.background,
+                ),
+                'mkdir': lambda: inst.mkdir(
                     *namespace.paths,
                     ignore_errors=namespace.ignore_errors,
-                )
-            elif cmd == 'rmdir':
-                return inst.rmdir(
+                ),
+                'rmdir': lambda: inst.rmdir(
                     *namespace.paths,
                     remove_parents=namespace.remove_parents,
                     ignore_errors=namespace.ignore_errors,
-                )
-            elif cmd == 'mv':
-                return inst.mv(
+                ),
+                'mv': lambda: inst.mv(
                     *(namespace.paths[:-1] if namespace.paths else ()),
                     dest=namespace.paths[-1] if namespace.paths else '',
                     force=namespace.force,
                     ignore_errors=namespace.ignore_errors,
-                )
-            elif cmd == 'cp':
-                return inst.cp(
+                    jobs=namespace.jobs,
+                ),
+                'cp': lambda: inst.cp(
                     *(namespace.paths[:-1] if namespace.paths else ()),
                     dest=namespace.paths[-1] if namespace.paths else '',
                     recursive=namespace.recursive,
                     follow_symlinks=namespace.follow_symlinks,
                     force=namespace.force,
                     ignore_errors=namespace.ignore_errors,
-                )
-            elif cmd == 'mklink':
-                return inst.mklink(
+                    jobs=namespace.jobs,
+                ),
+                'mklink': lambda: inst.mklink(
                     link=namespace.link,
                     target=namespace.target,
                     symlinkd=namespace.symlinkd,
                     force=namespace.force,
                     ignore_errors=namespace.ignore_errors,
-                )
-            elif cmd == 'fix-symlink':
-                return inst.fix_symlink(
+                ),
+                'fix-symlink': lambda: inst.fix_symlink(
                     patterns=namespace.patterns,
-                )
-            elif cmd == 'cwd':
-                return inst.cwd()
-            elif cmd == 'mydir':
-                return inst.mydir()
-            elif cmd == 'relpath':
-                return inst.relpath(
+                ),
+                'cwd': lambda: inst.cwd(),
+                'mydir': lambda: inst.mydir(),
+                'relpath': lambda: inst.relpath(
                     path=namespace.path,
                     start=namespace.start,
-                )
-            elif cmd == 'win2wsl-path':
-                return inst.win2wsl_path(
+                ),
+                'win2wsl-path': lambda: inst.win2wsl_path(
                     path=namespace.path,
-                )
-            elif cmd == 'wsl2win-path':
-                return inst.wsl2win_path(
+                ),
+                'wsl2win-path': lambda: inst.wsl2win_path(
                     path=namespace.path,
-                )
-            elif cmd == 'is-wsl-win-path':
-                return inst.is_wsl_win_path(
+                ),
+                'is-wsl-win-path': lambda: inst.is_wsl_win_path(
                     path=namespace.path,
-                )
-            elif cmd == 'touch':
-                return inst.touch(
+                ),
+                'touch': lambda: inst.touch(
                     paths=namespace.paths,
                     ignore_errors=namespace.ignore_errors,
-                )
-            elif cmd == 'timestamp':
-                return inst.timestamp()
-            elif cmd == 'cmpver':
-                return inst.cmpver(
+                ),
+                'timestamp': lambda: inst.timestamp(),
+                'cmpver': lambda: inst.cmpver(
                     v1=namespace.v1,
                     v2=namespace.v2,
                     force=namespace.force,
-                )
-            elif cmd == 'winreg':
-                return inst.winreg(
+                ),
+                'winreg': lambda: inst.winreg(
                     keys=namespace.keys,
-                )
-            elif cmd == 'ndk-root':
-                return inst.ndk_root()
-            elif cmd == 'cargo-exec':
-                return inst.cargo_exec(
+                ),
+                'ndk-root': lambda: inst.ndk_root(),
+                'cargo-exec': lambda: inst.cargo_exec(
                     cargo_toml_path=namespace.cargo_toml_path,
                     command=namespace.exec_cmd,
-                )
-            elif cmd == 'upload':
-                return inst.upload(
+                ),
+                'upload': lambda: inst.upload(
                     ftp_path=namespace.ftp_path,
                     files=namespace.files,
-                )
-            elif cmd == 'build-target-deps':
-                return inst.build_target_deps(
+                    verbose=namespace.verbose,
+                    jobs=namespace.jobs,
+                ),
+                'build-target-deps': lambda: inst.build_target_deps(
                     params=namespace.params,
-                )
-            elif cmd == 'dll2lib':
-                return inst.dll2lib(
+                ),
+                'dll2lib': lambda: inst.dll2lib(
                     dll_path=namespace.dll_path,
                     out_path=namespace.out_path,
                     force=namespace.force,
-                )
-            elif cmd == 'zig-patch':
-                return inst.zig_patch(
+                ),
+                'zig-patch': lambda: inst.zig_patch(
                     zig_root=namespace.zig_root,
-                )
-            elif cmd == 'zig-clean-cache':
-                return inst.zig_clean_cache(
+                ),
+                'zig-clean-cache': lambda: inst.zig_clean_cache(
                     zig_root=namespace.zig_root,
                     verbose=namespace.verbose,
-                )
-            elif cmd == 'find-shell':
-                return inst.find_shell(
+                ),
+                'find-shell': lambda: inst.find_shell(
                     exit_code=namespace.exit_code,
-                )
-            elif cmd == 'clone-libs':
-                return inst.clone_libs(
+                ),
+                'clone-libs': lambda: inst.clone_libs(
                     dest_dir=namespace.dest_dir,
                     url=namespace.url,
                     local_repo=namespace.local_repo,
                     files=namespace.files,
                     tmp_dir=namespace.tmp_dir,
                     rebuild=namespace.rebuild,
-                )
-            elif cmd == 'elf-path-fixer':
-                return inst.elf_path_fixer(
-                    elf_file=namespace.elf_file,
+                ),
+                'elf-path-fixer': lambda: inst.elf_path_fixer(
+                    *namespace.elf_files,
                     targets=namespace.targets,
                     fix_rpath=namespace.fix_rpath,
                     create_backup=namespace.create_backup,
                     verbose=namespace.verbose,
                     quiet=namespace.quiet,
-                )
-            elif cmd == 'zig-build-wrapper':
-                return inst.zig_build_wrapper(
+                ),
+                'zig-build-wrapper': lambda: inst.zig_build_wrapper(
                     zig_root=namespace.zig_root,
                     out_dir=namespace.out_dir,
                     prefix=namespace.prefix,
                     force=namespace.force,
                     vcpkg=namespace.vcpkg,
-                )
-            elif cmd == 'vcpkg-host-triplet':
-                return inst.vcpkg_host_triplet()
-            elif cmd == 'vcpkg-create-triplet-cache':
-                return inst.vcpkg_create_triplet_cache(
+                ),
+                'vcpkg-host-triplet': lambda: inst.vcpkg_host_triplet(),
+                'vcpkg-create-triplet-cache': lambda: inst.vcpkg_create_triplet_cache(
                     vcpkg_root=namespace.vcpkg_root,
                     triplet_cache_dir=namespace.triplet_cache_dir,
                     triplets=namespace.triplets,
                     debug=namespace.debug,
                     static_crt=namespace.static_crt,
                     static_lib=namespace.static_lib,
-                )
-            elif cmd == 'tar':
-                return inst.tar(
+                ),
+                'tar': lambda: inst.tar(
                     tar_command=namespace.tar_command,
                     output_path=getattr(namespace, 'output_path', None),
                     archive_path=getattr(namespace, 'archive_path', None),
@@ -2087,12 +2539,16 @@ class ShellCmd:
                     user=namespace.user,
                     group=namespace.group,
                     verbose=namespace.verbose,
-                )
-            elif cmd == 'sed-replace':
-                return inst.sed_replace(
+                ),
+                'sed-replace': lambda: inst.sed_replace(
                     *namespace.paths,
                     replacements=namespace.replacements,
-                )
+                ),
+            }
+
+            handler = handlers.get(cmd)
+            if handler is not None:
+                return handler()
 
             print(f'Unrecognized command "{cmd}"', file=sys.stderr)
             return cls.EINVAL
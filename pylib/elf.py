@@ -6,13 +6,42 @@
 
 """Pure Python ELF file parser and path fixer."""
 
+import bisect
+import functools
+import mmap
 import os
 import re
-import shutil
 import struct
 import sys
-import tempfile
-from typing import Any, BinaryIO, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Pattern, Tuple
+
+# ELF header: e_ident, e_type, e_machine, e_version, e_entry, e_phoff, e_shoff,
+# e_flags, e_ehsize, e_phentsize, e_phnum, e_shentsize, e_shnum, e_shstrndx
+_EHDR_FORMATS: Dict[int, str] = {32: '16sHHIIIIIHHHHHH', 64: '16sHHIQQQIHHHHHH'}
+# Program header: the field order differs between ELF32 and ELF64
+_PHDR_FORMATS: Dict[int, str] = {32: 'IIIIIIII', 64: 'IIQQQQQQ'}
+# Indices of (p_type, p_offset, p_vaddr, p_filesz) in a program header
+_PHDR_FIELDS: Dict[int, Tuple[int, int, int, int]] = {
+    32: (0, 1, 2, 4),
+    64: (0, 2, 3, 5),
+}
+# Section header: sh_name, sh_type, sh_flags, sh_addr, sh_offset, sh_size,
+# sh_link, sh_info, sh_addralign, sh_entsize
+_SHDR_FORMATS: Dict[int, str] = {32: 'IIIIIIIIII', 64: 'IIQQQQIIQQ'}
+# Dynamic entry: d_tag, d_val
+_DYN_FORMATS: Dict[int, str] = {32: 'iI', 64: 'qQ'}
+
+# (endian, bits) -> (Ehdr, Phdr, Shdr, Dyn)
+_ELF_STRUCTS: Dict[Tuple[str, int], Tuple[struct.Struct, ...]] = {
+    (endian, bits): (
+        struct.Struct(endian + _EHDR_FORMATS[bits]),
+        struct.Struct(endian + _PHDR_FORMATS[bits]),
+        struct.Struct(endian + _SHDR_FORMATS[bits]),
+        struct.Struct(endian + _DYN_FORMATS[bits]),
+    )
+    for endian in ('<', '>')
+    for bits in (32, 64)
+}
 
 
 class ElfParser:
@@ -21,147 +50,281 @@ class ElfParser:
     EI_NIDENT: int = 16
     ET_DYN: int = 3
 
+    PT_LOAD: int = 1
+
     DT_NEEDED: int = 1
     DT_RPATH: int = 15
     DT_RUNPATH: int = 29
     DT_STRTAB: int = 5
     DT_STRSZ: int = 10
+    # Tags whose value is an offset into the dynamic string table
+    DT_STRING_TAGS: Tuple[int, ...] = (DT_NEEDED, DT_RPATH, DT_RUNPATH)
 
     def __init__(self, elf_path: str) -> None:
         self.elf_path: str = elf_path
-        self.elf_file: Optional[BinaryIO] = None
+        self.mm: Optional[mmap.mmap] = None
+        self.view: Optional[memoryview] = None
         self.endian: str = '<'
         self.bits: int = 32
+        # Struct layouts bound once the ELF class and byte order are known.
+        self._ehdr, self._phdr, self._shdr, self._dyn = _ELF_STRUCTS[
+            (self.endian, self.bits)
+        ]
+        self.e_phoff: int = 0
+        self.e_phentsize: int = 0
+        self.e_phnum: int = 0
+        self.e_shoff: int = 0
+        self.e_shentsize: int = 0
+        self.e_shnum: int = 0
+        # PT_LOAD segments as (p_vaddr, p_offset, p_filesz), sorted by p_vaddr
+        self.load_segments: List[Tuple[int, int, int]] = []
+        self._segment_vaddrs: List[int] = []
+        # DT_STRTAB is a virtual address; `strtab_offset` is its file offset.
+        self.strtab_addr: int = 0
         self.strtab_offset: int = 0
         self.strtab_size: int = 0
         self.dynamic_section: Optional[List[Tuple[int, int]]] = None
-        self.string_table: Optional[bytes] = None
+        # A view into the mapping, only valid while the parser is open.
+        self.string_table: Optional[memoryview] = None
+        self._raw_strings: Dict[int, Optional[bytes]] = {}
+        self._string_cache: Dict[int, Optional[str]] = {}
 
     def __enter__(self) -> 'ElfParser':
-        self.elf_file = open(self.elf_path, 'rb')
-        self._parse_elf_header()
-        self._find_dynamic_section()
-        self._load_string_table()
+        with open(self.elf_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < self.EI_NIDENT:
+                raise ValueError('Not a valid ELF file')
+            # Headers, dynamic table and strings are scattered: disable read-ahead.
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_RANDOM)
+            # The mapping stays valid after the file object is closed.
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(mmap, 'MADV_RANDOM'):
+                self.mm.madvise(mmap.MADV_RANDOM)
+        self.view = memoryview(self.mm)
+        try:
+            self._parse_elf_header()
+            self._parse_program_headers()
+            self._find_dynamic_section()
+            self._load_string_table()
+        except BaseException:
+            self._close()
+            raise
         return self
 
     def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
-        if self.elf_file:
-            self.elf_file.close()
+        self._close()
+
+    def _close(self) -> None:
+        # Views must be released before the mapping can be closed.
+        if self.string_table is not None:
+            self.string_table.release()
+            self.string_table = None
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+
+    def _prefetch(self, offset: int, size: int) -> None:
+        """Ask the kernel to page in a region of the mapping that is read next."""
+        if hasattr(mmap, 'MADV_WILLNEED'):
+            assert self.mm is not None
+            start = offset - offset % mmap.PAGESIZE
+            end = min(offset + size, len(self.mm))
+            if start < end:
+                self.mm.madvise(mmap.MADV_WILLNEED, start, end - start)
+
+    def _check_span(self, offset: int, size: int) -> None:
+        """Reject a table that does not lie within the file, e.g. when truncated."""
+        assert self.view is not None
+        if offset < 0 or size < 0 or offset + size > len(self.view):
+            raise ValueError('Not a valid ELF file')
+
+    def _iter_table(
+        self, st: struct.Struct, offset: int, count: int, entsize: int
+    ) -> Iterator[Tuple[Any, ...]]:
+        """Unpack `count` table entries of `entsize` bytes each, starting at `offset`.
+
+        Entries may be padded beyond `st.size`; the padding is skipped.
+        """
+        assert self.view is not None
+        if entsize < st.size:
+            raise ValueError(f'Unsupported table entry size: {entsize}')
+        self._check_span(offset, count * entsize)
+        if entsize == st.size:
+            # Unpack the whole table from one contiguous span of the mapping.
+            return st.iter_unpack(self.view[offset : offset + count * entsize])
+        return (st.unpack_from(self.view, offset + i * entsize) for i in range(count))
 
     def _parse_elf_header(self) -> None:
         """Parse the ELF header to determine file characteristics."""
-        assert self.elf_file is not None
-        self.elf_file.seek(0)
+        assert self.view is not None
+        view = self.view
 
-        magic = self.elf_file.read(4)
-        if magic != b'\x7fELF':
+        if view[0:4] != b'\x7fELF':
             raise ValueError('Not a valid ELF file')
 
-        self.elf_file.seek(4)
-        ei_class = ord(self.elf_file.read(1))
-        self.bits = 64 if ei_class == 2 else 32
+        self.bits = 64 if view[4] == 2 else 32
+        self.endian = '>' if view[5] == 2 else '<'
 
-        ei_data = ord(self.elf_file.read(1))
-        self.endian = '>' if ei_data == 2 else '<'
+        self._ehdr, self._phdr, self._shdr, self._dyn = _ELF_STRUCTS[
+            (self.endian, self.bits)
+        ]
+        if len(view) < self._ehdr.size:
+            raise ValueError('Not a valid ELF file')
+        fields = self._ehdr.unpack_from(view, 0)
+        self.e_phoff, self.e_shoff = fields[5], fields[6]
+        self.e_phentsize, self.e_phnum = fields[9], fields[10]
+        self.e_shentsize, self.e_shnum = fields[11], fields[12]
+
+    def _parse_program_headers(self) -> None:
+        """Collect the PT_LOAD segments used to map addresses to file offsets."""
+        assert self.view is not None
+        phdr = self._phdr
+
+        if not self.e_phnum:
+            return
+
+        i_type, i_offset, i_vaddr, i_filesz = _PHDR_FIELDS[self.bits]
+        self.load_segments = sorted(
+            (fields[i_vaddr], fields[i_offset], fields[i_filesz])
+            for fields in self._iter_table(
+                phdr, self.e_phoff, self.e_phnum, self.e_phentsize
+            )
+            if fields[i_type] == self.PT_LOAD
+        )
+        self._segment_vaddrs = [vaddr for vaddr, _, _ in self.load_segments]
+
+    def _vaddr_to_offset(self, vaddr: int) -> int:
+        """Translate a virtual address to a file offset through the PT_LOAD segments."""
+        i = bisect.bisect_right(self._segment_vaddrs, vaddr) - 1
+        if i >= 0:
+            p_vaddr, p_offset, p_filesz = self.load_segments[i]
+            if vaddr < p_vaddr + p_filesz:
+                return vaddr - p_vaddr + p_offset
+        # No segment covers it (e.g. no program headers): assume it is an offset.
+        return vaddr
 
     def _find_dynamic_section(self) -> None:
         """Find the dynamic section in the ELF file."""
-        assert self.elf_file is not None
-        self.elf_file.seek(32 if self.bits == 32 else 40)
-        e_shoff = struct.unpack(
-            f'{self.endian}{"I" if self.bits == 32 else "Q"}',
-            self.elf_file.read(4 if self.bits == 32 else 8),
-        )[0]
-
-        self.elf_file.seek(46 if self.bits == 32 else 58)
-        e_shentsize = struct.unpack(f'{self.endian}H', self.elf_file.read(2))[0]
-        e_shnum = struct.unpack(f'{self.endian}H', self.elf_file.read(2))[0]
-
-        for i in range(e_shnum):
-            self.elf_file.seek(e_shoff + i * e_shentsize + 4)
-            sh_type = struct.unpack(f'{self.endian}I', self.elf_file.read(4))[0]
+        assert self.view is not None
+        view = self.view
+        shdr, dyn = self._shdr, self._dyn
+
+        if not self.e_shnum:
+            return
+        self._prefetch(self.e_shoff, self.e_shnum * self.e_shentsize)
+        for fields in self._iter_table(
+            shdr, self.e_shoff, self.e_shnum, self.e_shentsize
+        ):
+            _, sh_type, _, _, sh_offset, sh_size, *_ = fields
 
             if sh_type == 6:  # SHT_DYNAMIC
-                self.elf_file.seek(
-                    e_shoff + i * e_shentsize + (16 if self.bits == 32 else 24)
+                sh_size -= sh_size % dyn.size
+                self._check_span(sh_offset, sh_size)
+                self.dynamic_section = list(
+                    dyn.iter_unpack(view[sh_offset : sh_offset + sh_size])
                 )
-                sh_offset = struct.unpack(
-                    f'{self.endian}{"I" if self.bits == 32 else "Q"}',
-                    self.elf_file.read(4 if self.bits == 32 else 8),
-                )[0]
-                sh_size = struct.unpack(
-                    f'{self.endian}{"I" if self.bits == 32 else "Q"}',
-                    self.elf_file.read(4 if self.bits == 32 else 8),
-                )[0]
-
-                self.dynamic_section = []
-                entry_size = 8 if self.bits == 32 else 16
-                num_entries = sh_size // entry_size
-
-                for j in range(num_entries):
-                    self.elf_file.seek(sh_offset + j * entry_size)
-                    d_tag = struct.unpack(
-                        f'{self.endian}{"i" if self.bits == 32 else "q"}',
-                        self.elf_file.read(4 if self.bits == 32 else 8),
-                    )[0]
-                    d_val = struct.unpack(
-                        f'{self.endian}{"I" if self.bits == 32 else "Q"}',
-                        self.elf_file.read(4 if self.bits == 32 else 8),
-                    )[0]
-
-                    self.dynamic_section.append((d_tag, d_val))
 
+                for d_tag, d_val in self.dynamic_section:
                     if d_tag == self.DT_STRTAB:
-                        self.strtab_offset = d_val
+                        self.strtab_addr = d_val
                     elif d_tag == self.DT_STRSZ:
                         self.strtab_size = d_val
                 break
 
     def _load_string_table(self) -> None:
         """Load the dynamic string table."""
-        assert self.elf_file is not None
-        if self.strtab_offset and self.strtab_size:
-            self.elf_file.seek(self.strtab_offset)
-            self.string_table = self.elf_file.read(self.strtab_size)
-
-    def _get_string(self, offset: int) -> Optional[str]:
-        """Get a null-terminated string from the string table."""
+        assert self.view is not None
+        if self.strtab_addr and self.strtab_size:
+            self.strtab_offset = self._vaddr_to_offset(self.strtab_addr)
+            self._check_span(self.strtab_offset, self.strtab_size)
+            self._prefetch(self.strtab_offset, self.strtab_size)
+            self.string_table = self.view[
+                self.strtab_offset : self.strtab_offset + self.strtab_size
+            ]
+
+            # Resolve the strings referenced by the dynamic section in one pass.
+            # .dynstr also holds every dynamic symbol name, so splitting the whole
+            # table would cost far more than the few lookups needed here.
+            for d_tag, d_val in self.dynamic_section or ():
+                if d_tag in self.DT_STRING_TAGS:
+                    self._get_raw_string(d_val)
+
+    def _get_raw_string(self, offset: int) -> Optional[bytes]:
+        """Get the raw bytes of a null-terminated string in the string table."""
         if not self.string_table:
             return None
+        assert self.mm is not None
 
-        end = self.string_table.find(b'\0', offset)
-        if end == -1:
-            return None
+        # Cache per offset: linkers merge string tails, so an offset may point
+        # into the middle of another string.
+        try:
+            return self._raw_strings[offset]
+        except KeyError:
+            pass
 
-        return self.string_table[offset:end].decode('utf-8', errors='replace')
+        start = self.strtab_offset + offset
+        end = self.mm.find(b'\0', start, self.strtab_offset + len(self.string_table))
+        value = self.mm[start:end] if end != -1 else None
+        self._raw_strings[offset] = value
+        return value
 
-    def get_needed_libraries(self) -> List[Tuple[str, int]]:
-        """Get the list of needed libraries with their file offsets."""
+    def _get_string(self, offset: int) -> Optional[str]:
+        """Get a null-terminated string from the string table."""
+        try:
+            return self._string_cache[offset]
+        except KeyError:
+            pass
+
+        raw = self._get_raw_string(offset)
+        value = raw.decode('utf-8', errors='replace') if raw is not None else None
+        self._string_cache[offset] = value
+        return value
+
+    def get_dynamic_strings(
+        self, tags: Tuple[int, ...]
+    ) -> List[Tuple[bytes, int, int]]:
+        """Get the undecoded strings of dynamic entries with the given tags.
+
+        Returns a list of (raw string, string table offset, tag) tuples.
+        """
         if not self.dynamic_section:
             return []
 
-        needed_libs = []
+        strings = []
         for d_tag, d_val in self.dynamic_section:
-            if d_tag == self.DT_NEEDED:
-                lib_name = self._get_string(d_val)
-                if lib_name:
-                    needed_libs.append((lib_name, d_val))
+            if d_tag in tags:
+                raw = self._get_raw_string(d_val)
+                if raw:
+                    strings.append((raw, d_val, d_tag))
 
-        return needed_libs
+        return strings
+
+    def get_needed_libraries(self) -> List[Tuple[str, int]]:
+        """Get the list of needed libraries with their file offsets."""
+        return [
+            (self._get_string(offset) or '', offset)
+            for _, offset, _ in self.get_dynamic_strings((self.DT_NEEDED,))
+        ]
 
     def get_rpath_runpath(self) -> List[Tuple[str, int, int]]:
         """Get the RPATH and RUNPATH entries with their file offsets."""
-        if not self.dynamic_section:
-            return []
+        return [
+            (self._get_string(offset) or '', offset, tag)
+            for _, offset, tag in self.get_dynamic_strings(
+                (self.DT_RPATH, self.DT_RUNPATH)
+            )
+        ]
 
-        paths = []
-        for d_tag, d_val in self.dynamic_section:
-            if d_tag in (self.DT_RPATH, self.DT_RUNPATH):
-                path = self._get_string(d_val)
-                if path:
-                    paths.append((path, d_val, d_tag))
 
-        return paths
+@functools.lru_cache(maxsize=32)
+def _compile_target_patterns(target_patterns: Tuple[str, ...]) -> Pattern[bytes]:
+    """Compile target patterns into one bytes regex, shared across ELF files."""
+    # One alternation runs a single regex pass instead of one per pattern. It
+    # matches raw bytes, so only the strings being replaced are ever decoded.
+    return re.compile('|'.join(f'(?:{pat})' for pat in target_patterns).encode('utf-8'))
 
 
 def modify_elf_file(
@@ -175,130 +338,132 @@ def modify_elf_file(
 ) -> bool:
     """Modify the ELF file to remove directory paths containing the target string."""
 
-    def print_info(message: str, is_verbose: bool = False) -> None:
-        if is_verbose or (not quiet and not is_verbose):
+    # Decide the output level once: `quiet` keeps errors only, and the per-entry
+    # listing needs `verbose`.
+    show_summary = not quiet
+    show_details = verbose and not quiet
+
+    def print_info(message: str) -> None:
+        if show_summary:
             print(f'[INFO] {message}')
 
     def print_error(message: str) -> None:
-        if not quiet:
-            print(f'[ERROR] {message}', file=sys.stderr)
-
-    temp_dir = None
-    temp_elf = None
-    try:
-        patterns = [re.compile(pat) for pat in target_patterns]
-
-        with ElfParser(elf_path) as parser:
-            needed_libs = parser.get_needed_libraries()
-            paths = parser.get_rpath_runpath()
-            strtab_offset = parser.strtab_offset
-
-        print_info(f'Found {len(needed_libs)} dynamic libraries in {elf_path}')
-        for lib, _ in needed_libs:
-            print_info(f'  - {lib}', verbose)
-
-        print_info(f'Found {len(paths)} RUNPATH/RPATH entries')
-        for path, _, _ in paths:
-            print_info(f'  - {path}', verbose)
-
-        modified_libs = []
-        for lib, offset in needed_libs:
-            if any(pat.search(lib) is not None for pat in patterns):
-                filename = os.path.basename(lib)
-                modified_libs.append((lib, filename, offset))
-
-        modified_paths = []
-        for path, offset, tag_type in paths:
-            if fix_rpath and any(pat.search(path) is not None for pat in patterns):
-                new_paths = []
-                for p in path.split(':'):
-                    if any(pat.search(p) is not None for pat in patterns):
-                        print_info(f'  Removing directory path from: {p}')
-                    else:
-                        new_paths.append(p)
-
-                new_path = ':'.join(new_paths) if new_paths else ''
-                modified_paths.append((path, new_path, offset))
-
-        if not modified_libs and not modified_paths:
-            print_info('No modifications needed')
-            return True
-
-        if create_backup:
-            temp_dir = tempfile.mkdtemp()
-            temp_elf = os.path.join(temp_dir, os.path.basename(elf_path))
-            print_info('Creating temporary copy for backup')
-            shutil.copy2(elf_path, temp_elf)
-
-            backup_path = f'{elf_path}.backup'
-            print_info(f'Creating backup at {backup_path}')
-            shutil.copy2(elf_path, backup_path)
-
-            file_to_modify = temp_elf
-        else:
-            print_info('Modifying original file directly (no backup)')
-            file_to_modify = elf_path
-
-        with open(file_to_modify, 'rb+') as f:
-            for old_lib, new_lib, offset in modified_libs:
-                abs_offset = strtab_offset + offset
-                f.seek(abs_offset)
-                actual_bytes = f.read(len(old_lib))
-                actual_string = actual_bytes.decode('utf-8', errors='replace')
-                if actual_string != old_lib:
-                    print_error(
-                        f"Verification failed: Expected '{old_lib}' but found '{actual_string}' at offset {abs_offset}"
-                    )
-                    continue
-
-                print_info(f'Replacing {old_lib} with {new_lib}')
-                f.seek(abs_offset)
-                new_bytes = new_lib.encode('utf-8') + b'\0'
-                old_bytes = old_lib.encode('utf-8') + b'\0'
-
-                if len(new_bytes) > len(old_bytes):
-                    print_error(
-                        'New library name is longer than old name, cannot replace in-place'
-                    )
-                    continue
-
-                if len(new_bytes) < len(old_bytes):
-                    new_bytes += b'\0' * (len(old_bytes) - len(new_bytes))
-
-                f.write(new_bytes)
-
-            for old_path, new_path, offset in modified_paths:
-                abs_offset = strtab_offset + offset
-                f.seek(abs_offset)
-                actual_string = f.read(len(old_path)).decode('utf-8', errors='replace')
-                if actual_string != old_path:
-                    print_error(
-                        f"Verification failed: Expected '{old_path}' but found '{actual_string}' at offset {abs_offset}"
-                    )
-                    continue
-
-                print_info(f'Replacing path {old_path} with {new_path}')
-                f.seek(abs_offset)
-                new_bytes = new_path.encode('utf-8') + b'\0'
-                old_bytes = old_path.encode('utf-8') + b'\0'
-
-                if len(new_bytes) > len(old_bytes):
-                    print_error(
-                        'New path is longer than old path, cannot replace in-place'
-                    )
-                    continue
-
-                if len(new_bytes) < len(old_bytes):
-                    new_bytes += b'\0' * (len(old_bytes) - len(new_bytes))
-
-                f.write(new_bytes)
-
-        if create_backup and temp_elf:
-            print_info(f'Updating {elf_path} with modified version')
-            shutil.copy2(temp_elf, elf_path)
-
-        print_info('ELF file successfully updated')
+        print(f'[ERROR] {message}', file=sys.stderr)
+
+    def decode(raw: bytes) -> str:
+        return raw.decode('utf-8', errors='replace')
+
+    combined = _compile_target_patterns(tuple(target_patterns))
+    match_cache: Dict[bytes, bool] = {}
+
+    def matches(s: bytes) -> bool:
+        # RPATH components repeat across entries, so test each string only once.
+        result = match_cache.get(s)
+        if result is None:
+            result = match_cache[s] = combined.search(s) is not None
+        return result
+
+    with ElfParser(elf_path) as parser:
+        needed_libs = parser.get_dynamic_strings((ElfParser.DT_NEEDED,))
+        paths = parser.get_dynamic_strings((ElfParser.DT_RPATH, ElfParser.DT_RUNPATH))
+        strtab_offset = parser.strtab_offset
+        strtab_size = parser.strtab_size
+        # Snapshot of the parsed table; every string to patch was taken from it.
+        strtab = bytes(parser.string_table or b'')
+
+    # Buffer the listing and write it at once; large binaries have many entries.
+    lines: List[str] = []
+    if show_summary:
+        lines.append(f'[INFO] Found {len(needed_libs)} dynamic libraries in {elf_path}')
+    if show_details:
+        lines.extend(f'[INFO]   - {decode(lib)}' for lib, _, _ in needed_libs)
+    if show_summary:
+        lines.append(f'[INFO] Found {len(paths)} RUNPATH/RPATH entries')
+    if show_details:
+        lines.extend(f'[INFO]   - {decode(path)}' for path, _, _ in paths)
+    if lines:
+        lines.append('')
+        sys.stdout.write('\n'.join(lines))
+
+    modified_libs = []
+    for lib, offset, _ in needed_libs:
+        if matches(lib):
+            filename = os.path.basename(lib)
+            modified_libs.append((lib, filename, offset))
+
+    modified_paths = []
+    for path, offset, _ in paths:
+        if fix_rpath and matches(path):
+            new_paths = []
+            for p in path.split(b':'):
+                if matches(p):
+                    print_info(f'  Removing directory path from: {decode(p)}')
+                else:
+                    new_paths.append(p)
+
+            new_path = b':'.join(new_paths)
+            modified_paths.append((path, new_path, offset))
+
+    if not modified_libs and not modified_paths:
+        print_info('No modifications needed')
         return True
-    finally:
-        if temp_dir:
-            shutil.rmtree(temp_dir)
+
+    if create_backup:
+        import shutil
+
+        # A hard link would share the patched bytes, so take a real copy once
+        # and then patch the original file in place.
+        backup_path = f'{elf_path}.backup'
+        print_info(f'Creating backup at {backup_path}')
+        shutil.copy2(elf_path, backup_path)
+    else:
+        print_info('Modifying original file directly (no backup)')
+
+    with open(elf_path, 'rb+') as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_WRITE
+    ) as mm:
+        # Verify the whole table once instead of re-reading each string.
+        if mm[strtab_offset : strtab_offset + len(strtab)] != strtab:
+            print_error(
+                f'Verification failed: the string table at offset {strtab_offset} '
+                'changed since it was parsed'
+            )
+            return False
+
+        for old_lib, new_lib, offset in modified_libs:
+            abs_offset = strtab_offset + offset
+            old_bytes = old_lib + b'\0'
+            print_info(f'Replacing {decode(old_lib)} with {decode(new_lib)}')
+            new_bytes = new_lib + b'\0'
+
+            if len(new_bytes) > len(old_bytes):
+                print_error(
+                    'New library name is longer than old name, cannot replace in-place'
+                )
+                continue
+
+            mm[abs_offset : abs_offset + len(old_bytes)] = new_bytes.ljust(
+                len(old_bytes), b'\0'
+            )
+
+        for old_path, new_path, offset in modified_paths:
+            abs_offset = strtab_offset + offset
+            old_bytes = old_path + b'\0'
+            print_info(f'Replacing path {decode(old_path)} with {decode(new_path)}')
+            new_bytes = new_path + b'\0'
+
+            if len(new_bytes) > len(old_bytes):
+                print_error('New path is longer than old path, cannot replace in-place')
+                continue
+
+            mm[abs_offset : abs_offset + len(old_bytes)] = new_bytes.ljust(
+                len(old_bytes), b'\0'
+            )
+
+        # All edits live in the string table: sync only the pages covering it.
+        flush_start = strtab_offset - strtab_offset % mmap.ALLOCATIONGRANULARITY
+        flush_end = min(strtab_offset + strtab_size, len(mm))
+        mm.flush(flush_start, flush_end - flush_start)
+
+    print_info('ELF file successfully updated')
+    return True
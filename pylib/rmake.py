@@ -10,7 +10,9 @@ import os
 import re
 import subprocess
 import sys
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+_VALID_FILE_NAME_RE = re.compile(r'^[^\\\/:*?\"<>|]{1,255}$')
 
 
 class RmakeUserBase:
@@ -32,11 +34,18 @@ class RmakeUserBase:
         rmake = self.rmake
         rmake.git_clone()
 
-        rsync = ['rsync']
-        rsync.extend(rmake.rsync_args)
-        rsync.append((rmake.src_dir + '/').replace('//', '/'))
-        rsync.append((rmake.dst_dir + '/').replace('//', '/'))
-        subprocess.check_call(rsync)
+        # Trailing slashes make rsync copy directory contents; this only runs on
+        # the POSIX side, so `os.path.join` appends '/'.
+        src = os.path.join(rmake.src_dir, '')
+        dst = os.path.join(rmake.dst_dir, '')
+        if rmake.args.rsync_jobs > 1:
+            rmake.rsync_parallel(src, dst, rmake.args.rsync_jobs)
+        else:
+            rsync = ['rsync']
+            rsync.extend(rmake.rsync_args)
+            rsync.append(src)
+            rsync.append(dst)
+            subprocess.check_call(rsync, env=rmake.env)
 
     def sync_backward(self) -> None:
         """Synchronize build outputs backward to local."""
@@ -58,24 +67,36 @@ class RsyncMake:
     """Implement sync-and-make logic for WSL2 cross-compilation."""
 
     RMAKE_REMOTE_ROOT: str = '~/.rmake/githome'
+    RMAKE_PYCACHE_DIR: str = '~/.rmake/pycache'
     RMAKE_USER: str = '.rmake-user.py'
     RMAKE_USER_CLASS: str = 'RmakeUser'
     RMAKE_INCLUDES: str = '.rmake-includes'
     RMAKE_EXCLUDES: str = '.rmake-excludes'
-    RSYNC_ARGS: List[str] = ['-v', '-rlpt', '--mkpath', '--delete', '--exclude=.git']
+    # Immutable defaults, copied into the per-run `rsync_args` and `make_targets`.
+    RSYNC_ARGS: Tuple[str, ...] = (
+        '-v',
+        '-rlpt',
+        '--mkpath',
+        '--delete',
+        '--exclude=.git',
+    )
     RSYNC_BACKWARD_ARGS: List[str] = [
         '-v',
         f'-rl{"t" if _rsync_times_ok() else "c"}',
         '--mkpath',
     ]
-    MAKE_TARGETS: List[str] = [
+    # Changed-file sets above this count with a median size below the limit
+    # are copied through a tar pipe by `rsync_parallel`.
+    TAR_MIN_FILES: int = 1000
+    TAR_MAX_MEDIAN_SIZE: int = 64 * 1024
+    MAKE_TARGETS: Tuple[str, ...] = (
         'cargo',
         'cargo-*',
         'clean',
         'clean-*',
         'cmake',
         'cmake-*',
-    ]
+    )
 
     def __init__(self) -> None:
         self.args: Any = None
@@ -89,23 +110,49 @@ class RsyncMake:
         self.commands: List[str] = []
         self.make_vars: List[str] = []
         self.exec_cmd_args: List[str] = []
+        # The `-e` options; a value of None removes the variable.
+        self.env_overrides: Dict[str, Optional[str]] = {}
         self.workspace_dir: str = RsyncMake.get_workspace_dir(__file__)
 
         self.has_synced_forward: bool = False
         self.need_sync_backward: bool = False
+        # Whether `dst_dir` exists, probed once in `_run()` and kept up to date.
+        self._dst_is_dir: bool = False
+        # Git query results keyed by (working directory, query, argument).
+        self._git_cache: Dict[Tuple[str, str, str], Any] = {}
+
+    @property
+    def env(self) -> Dict[str, str]:
+        """Environment of the child processes: `os.environ` with the `-e` options.
+
+        Built on each access, so that changes the user script makes to
+        `os.environ` are passed on as well.
+        """
+        env = dict(os.environ)
+        for name, value in self.env_overrides.items():
+            if value is None:
+                env.pop(name, None)
+            else:
+                env[name] = value
+        return env
 
     def _run(self, args: Any) -> int:
         self.args = args
-        self.src_dir = os.path.realpath(self.args.src_dir or self.workspace_dir)
+        # `workspace_dir` is derived from a resolved path, so only resolve options.
+        self.src_dir = (
+            os.path.realpath(self.args.src_dir)
+            if self.args.src_dir
+            else self.workspace_dir
+        )
 
         if self.args.dst_dir:
-            self.dst_dir = self.args.dst_dir
+            self.dst_dir = os.path.realpath(self.args.dst_dir)
         else:
             git_home_base = os.path.basename(self.remote_root)
             idx = self.src_dir.find(os.sep + git_home_base + os.sep)
             if idx >= 0:
-                self.dst_dir = (
-                    self.remote_root + self.src_dir[idx + len(git_home_base) + 1 :]
+                self.dst_dir = os.path.join(
+                    self.remote_root, self.src_dir[idx + len(git_home_base) + 2 :]
                 )
             else:
                 from urllib.parse import quote, urlparse
@@ -131,21 +178,30 @@ class RsyncMake:
                     quote(git_hostname),
                     git_path,
                 )
-        self.dst_dir = os.path.realpath(self.dst_dir)
+            # Derived paths lie under `remote_root` and may not exist yet, so a
+            # lexical normalization replaces resolving them component by component.
+            self.dst_dir = os.path.normpath(self.dst_dir)
 
         self.rsync_args.extend(self.args.rsync_args or [])
-        if not list(filter(lambda x: x.startswith('--include-from='), self.rsync_args)):
-            include_from = os.path.join(self.src_dir, self.RMAKE_INCLUDES)
-            if os.path.isfile(include_from):
-                self.rsync_args.append('--include-from=' + include_from)
-        if not list(filter(lambda x: x.startswith('--exclude-from='), self.rsync_args)):
-            exclude_from = os.path.join(self.src_dir, self.RMAKE_EXCLUDES)
-            if not os.path.isfile(exclude_from):
-                exclude_from = os.path.join(self.src_dir, '.gitignore')
-                if not os.path.isfile(exclude_from):
-                    exclude_from = ''
-            if exclude_from:
-                self.rsync_args.append('--exclude-from=' + exclude_from)
+        # One listing of the source root answers all the filter file probes.
+        try:
+            with os.scandir(self.src_dir) as it:
+                src_files = {x.name for x in it if x.is_file()}
+        except OSError:
+            src_files = set()
+        options = {x.split('=', 1)[0] for x in self.rsync_args}
+        if '--include-from' not in options:
+            if self.RMAKE_INCLUDES in src_files:
+                self.rsync_args.append(
+                    '--include-from=' + os.path.join(self.src_dir, self.RMAKE_INCLUDES)
+                )
+        if '--exclude-from' not in options:
+            for name in (self.RMAKE_EXCLUDES, '.gitignore'):
+                if name in src_files:
+                    self.rsync_args.append(
+                        '--exclude-from=' + os.path.join(self.src_dir, name)
+                    )
+                    break
 
         self.commands.extend(x for x in self.args.commands if '=' not in x)
         if not self.commands:
@@ -168,47 +224,39 @@ class RsyncMake:
             flush=True,
         )
 
-        if os.path.isdir(self.dst_dir):
+        self._dst_is_dir = os.path.isdir(self.dst_dir)
+        if self._dst_is_dir:
             os.chdir(self.dst_dir)
 
         for item in self.args.env_vars or []:
             kv = item.split('=', 1)
             if len(kv) == 2:
-                if kv[1]:
-                    os.environ[kv[0]] = kv[1]
-                elif kv[0] in os.environ:
-                    del os.environ[kv[0]]
+                self.env_overrides[kv[0]] = kv[1] or None
 
         self.user.prepare()
 
+        # Build after `prepare()`, which may extend the make targets.
+        make_target_re = re.compile(
+            '^(?:build|{})$'.format(
+                '|'.join(re.escape(x).replace(r'\*', '.*') for x in self.make_targets)
+            )
+        )
+        builtin_commands: Dict[str, Callable[[], None]] = {
+            'clone': lambda: self.git_checkout(force=True),
+            'pull': lambda: self.git_checkout(force=True),
+            'checkout': lambda: self.git_checkout(force=self.args.force),
+            'remove-git': self.remove_git,
+            'rsync': lambda: self.sync_forward(force=True),
+            'rsync-back': self.run_sync_backward,
+            'exec': self.run_exec,
+        }
         for command in self.commands:
-            if command in ('clone', 'pull'):
-                self.git_checkout(force=True)
-            elif command == 'checkout':
-                self.git_checkout(force=self.args.force)
-            elif command == 'remove-git':
-                if os.path.isdir(self.dst_dir):
-                    import shutil
-
-                    os.chdir(os.path.expanduser('~'))
-                    print(f'Removing {self.dst_dir} ...')
-                    shutil.rmtree(self.dst_dir)
-                    print('Done.')
-            elif command == 'rsync':
-                self.sync_forward(force=True)
-            elif command == 'rsync-back':
-                self.sync_backward()
-                self.finish_sync_backward()
-            elif command == 'exec':
-                if self.exec_cmd_args:
-                    os.chdir(self.dst_dir)
-                    subprocess.check_call(self.exec_cmd_args)
+            handler = builtin_commands.get(command)
+            if handler is not None:
+                handler()
             elif self.user.exec_command(command) != -1:
                 pass
-            elif re.match(
-                f'^(?:build|{"|".join(self.make_targets).replace("*", ".*")})$',
-                command,
-            ):
+            elif make_target_re.match(command):
                 self.sync_forward()
                 self.run_make(command)
                 self.sync_backward()
@@ -219,6 +267,28 @@ class RsyncMake:
             self.finish_sync_backward()
         return 0
 
+    def remove_git(self) -> None:
+        """Remove the git repository at the destination."""
+        if self._dst_is_dir:
+            import shutil
+
+            os.chdir(os.path.expanduser('~'))
+            print(f'Removing {self.dst_dir} ...')
+            shutil.rmtree(self.dst_dir)
+            self._dst_is_dir = False
+            print('Done.')
+
+    def run_exec(self) -> None:
+        """Execute the command line following `exec` at the destination."""
+        if self.exec_cmd_args:
+            os.chdir(self.dst_dir)
+            subprocess.check_call(self.exec_cmd_args, env=self.env)
+
+    def run_sync_backward(self) -> None:
+        """Synchronize build outputs backward immediately."""
+        self.sync_backward()
+        self.finish_sync_backward()
+
     def error(self, message: str, code: int = 1) -> None:
         """Show error message and exit with code."""
         print(f'*** [Error {code}]', message, file=sys.stderr)
@@ -226,60 +296,163 @@ class RsyncMake:
 
     def load_user_script(self, script_path: str) -> None:
         """Load optional custom user script (like .rmake-user.py)."""
-        with open(script_path, 'r') as fp:
-            code = fp.read()
-        exec(code, globals(), globals())
-        user_cls = globals().get(self.RMAKE_USER_CLASS)
+        import importlib.util
+
+        spec = importlib.util.spec_from_file_location('rmake_user', script_path)
+        if spec is None or spec.loader is None:
+            self.error(f'Cannot load "{script_path}".')
+            return
+        module = importlib.util.module_from_spec(spec)
+        # User scripts refer to `RmakeUserBase` and friends without importing them.
+        for name, value in globals().items():
+            if not name.startswith('__'):
+                setattr(module, name, value)
+        # Registered like a regular import, so that pickling and annotation
+        # lookups such as `typing.get_type_hints` can find the script module.
+        sys.modules[spec.name] = module
+        # Cache the bytecode outside the workspace instead of in `__pycache__`.
+        pycache_prefix = sys.pycache_prefix
+        sys.pycache_prefix = os.path.expanduser(self.RMAKE_PYCACHE_DIR)
+        try:
+            spec.loader.exec_module(module)
+        finally:
+            sys.pycache_prefix = pycache_prefix
+        user_cls = getattr(module, self.RMAKE_USER_CLASS, None)
         if not isinstance(user_cls, type) or not issubclass(user_cls, RmakeUserBase):
             self.error(
                 f'Class {self.RMAKE_USER_CLASS} is not defined in "{script_path}".'
             )
         self.user = user_cls(self)  # pyright: ignore[reportOptionalCall]
 
-    def git_config_get(self, key: str) -> str:
+    def _git_cached(
+        self,
+        query: str,
+        arg: str,
+        func: Callable[[], Any],
+        cwd: Optional[str] = None,
+    ) -> Any:
+        """Run a git query once per repository directory and argument."""
+        key = (cwd or os.getcwd(), query, arg)
+        if key not in self._git_cache:
+            self._git_cache[key] = func()
+        return self._git_cache[key]
+
+    def _git_output(self, *args: str, cwd: Optional[str] = None) -> str:
+        """Run a git query and return its stripped output."""
+        # Decoding the bytes directly skips the text I/O wrapper of `text=True`;
+        # queries never read input, which also keeps them off a shared terminal.
+        return (
+            subprocess.check_output(
+                ['git', *args], stdin=subprocess.DEVNULL, cwd=cwd, env=self.env
+            )
+            .decode('utf-8', 'replace')
+            .strip()
+        )
+
+    def git_config_get(self, key: str, cwd: Optional[str] = None) -> str:
         """Query git config value."""
-        return subprocess.check_output(
-            ['git', 'config', '--get', key], text=True
-        ).strip()
+        return self._git_cached(
+            'config',
+            key,
+            lambda: self._git_output('config', '--get', key, cwd=cwd),
+            cwd,
+        )
+
+    def git_current_branch(self, cwd: Optional[str] = None) -> str:
+        """Query the current branch of the working directory."""
+        return self._git_cached(
+            'branch',
+            '',
+            lambda: self._git_output('rev-parse', '--abbrev-ref', 'HEAD', cwd=cwd),
+            cwd,
+        )
+
+    def git_head_branch(self) -> str:
+        """Read the current branch of the working directory from `.git/HEAD`."""
+        try:
+            with open(os.path.join('.git', 'HEAD'), 'r') as fp:
+                head = fp.read().strip()
+        except OSError:
+            # `.git` is a file in worktrees and submodules; let git resolve it.
+            return self._git_output('rev-parse', '--abbrev-ref', 'HEAD')
+        prefix = 'ref: refs/heads/'
+        return head[len(prefix) :] if head.startswith(prefix) else 'HEAD'
+
+    def git_local_branches(self) -> Set[str]:
+        """Query the local branches of the working directory."""
+        output = self._git_output(
+            'for-each-ref', '--format=%(refname:short)', 'refs/heads/'
+        )
+        return set(output.splitlines())
 
     def git_remote_branch_exists(self, branch: str) -> bool:
-        """Check if remote branch exists."""
-        return (
-            subprocess.call(
-                [
-                    'git',
-                    'ls-remote',
-                    '--exit-code',
-                    '--heads',
-                    self.args.git_origin,
-                    branch,
-                ],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-            == 0
+        """Check if the branch exists at the remote of the source repository."""
+        return self._git_cached(
+            'ls-remote',
+            branch,
+            lambda: (
+                subprocess.call(
+                    [
+                        'git',
+                        'ls-remote',
+                        '--exit-code',
+                        '--heads',
+                        self.args.git_origin,
+                        branch,
+                    ],
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    cwd=self.src_dir,
+                    env=self.env,
+                )
+                == 0
+            ),
+            self.src_dir,
+        )
+
+    def git_is_shallow(self) -> bool:
+        """Check if the repository in the working directory is kept shallow."""
+        return not self.args.full_history and os.path.isfile(
+            os.path.join('.git', 'shallow')
         )
 
+    def git_submodule_update(self) -> None:
+        """Update submodules recursively, fetching several of them in parallel."""
+        if not os.path.isfile('.gitmodules'):
+            return
+        # `submodule.fetchJobs` is ignored by git versions without parallel fetch,
+        # unlike the `--jobs` option.
+        git_update = ['git', '-c', f'submodule.fetchJobs={min(8, os.cpu_count() or 4)}']
+        git_update.extend(['submodule', 'update', '--init', '--recursive'])
+        if self.git_is_shallow():
+            git_update.append('--depth=1')
+        subprocess.check_call(git_update, env=self.env)
+
     def git_clone(self) -> None:
         """Perform initial git clone to target remote destination."""
-        if os.path.isdir(self.dst_dir):
+        # A forward rsync may have created the directory since it was probed.
+        if self._dst_is_dir or os.path.isdir(self.dst_dir):
+            self._dst_is_dir = True
             os.chdir(self.dst_dir)
             return
 
-        os.chdir(self.src_dir)
-        url = self.git_config_get(f'remote.{self.args.git_origin}.url')
-        branch = subprocess.check_output(
-            ['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
-            text=True,
-        ).strip()
+        url = self.git_config_get(f'remote.{self.args.git_origin}.url', self.src_dir)
+        branch = self.git_current_branch(self.src_dir)
 
         git_clone = ['git', 'clone']
+        if not self.args.full_history:
+            git_clone.extend(['--depth=1', '--single-branch'])
+        elif self.args.partial_clone:
+            # All commits and trees, with file contents fetched on demand.
+            git_clone.append('--filter=blob:none')
         if self.git_remote_branch_exists(branch):
             git_clone.extend(['--branch', branch])
         git_clone.extend([url, self.dst_dir])
         try:
             os.makedirs(os.path.dirname(self.dst_dir), exist_ok=True)
-            subprocess.check_call(git_clone)
+            subprocess.check_call(git_clone, env=self.env)
+            self._dst_is_dir = True
             os.chdir(self.dst_dir)
         except (OSError, subprocess.CalledProcessError):
             import shutil
@@ -288,80 +461,99 @@ class RsyncMake:
                 os.chdir(os.path.expanduser('~'))
                 shutil.rmtree(self.dst_dir)
             raise
-        subprocess.check_call(['git', 'submodule', 'update', '--init', '--recursive'])
+        self.git_submodule_update()
 
     def git_checkout(self, force: bool = False) -> None:
         """Checkout and sync git repository branch at the destination."""
         self.git_clone()
-        cwd = os.getcwd()
-        try:
-            os.chdir(self.src_dir)
-            branch = subprocess.check_output(
-                ['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
-                text=True,
-            ).strip()
-        finally:
-            os.chdir(cwd)
+        branch = self.git_current_branch(self.src_dir)
+
+        # Reading HEAD directly avoids starting git when nothing is to be switched.
+        if force or self.git_head_branch() != branch:
+            from concurrent.futures import ThreadPoolExecutor
+
+            branch_exists = branch in self.git_local_branches()
+            # When the branch has to be created from the remote, ask the remote
+            # about it while the local work tree is cleaned.
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                remote_branch_exists = executor.submit(
+                    lambda: not branch_exists and self.git_remote_branch_exists(branch)
+                )
+                if force:
+                    subprocess.call(['git', 'clean', '--force', '-d'], env=self.env)
+                    subprocess.call(['git', 'checkout', '--force'], env=self.env)
+                    # One pass discards the local changes of every submodule; the
+                    # update after `git pull` checks out the recorded commits.
+                    if os.path.isfile('.gitmodules'):
+                        subprocess.call(
+                            [
+                                'git',
+                                'submodule',
+                                'foreach',
+                                '--recursive',
+                                'git clean --force -d && git reset --hard --quiet',
+                            ],
+                            env=self.env,
+                        )
 
-        if force:
-            subprocess.call(['git', 'clean', '--force', '-d'])
-            subprocess.call(['git', 'checkout', '--force'])
-            subprocess.call(
+                git_checkout = ['git', 'checkout']
+                if force:
+                    git_checkout.append('--force')
+                if branch_exists:
+                    # `git pull` below fetches the upstream of an existing branch.
+                    git_checkout.append(branch)
+                    subprocess.check_call(git_checkout, env=self.env)
+                elif remote_branch_exists.result():
+                    # Fetch only the wanted branch instead of every remote ref.
+                    origin = self.args.git_origin
+                    git_fetch = ['git', 'fetch', '--no-tags']
+                    if self.git_is_shallow():
+                        # A shallow clone tracks only the branches added here, so
+                        # that the new branch gets its upstream.
+                        subprocess.check_call(
+                            ['git', 'remote', 'set-branches', '--add', origin, branch],
+                            env=self.env,
+                        )
+                        git_fetch.append('--depth=1')
+                    git_fetch.extend(
+                        [origin, f'+refs/heads/{branch}:refs/remotes/{origin}/{branch}']
+                    )
+                    subprocess.check_call(git_fetch, env=self.env)
+                    git_checkout.extend(['-b', branch, f'{origin}/{branch}'])
+                    subprocess.check_call(git_checkout, env=self.env)
+            self._git_cache.clear()
+
+        if force and self.git_is_shallow():
+            # `git pull` can't merge into a shallow history once the upstream
+            # has been rewritten, so a forced update moves the branch to the
+            # fetched tip instead.
+            subprocess.check_call(
                 [
                     'git',
-                    'submodule',
-                    'foreach',
-                    '--recursive',
-                    'git',
-                    'clean',
-                    '--force',
-                    '-d',
-                ]
+                    'fetch',
+                    '--no-tags',
+                    '--depth=1',
+                    self.args.git_origin,
+                    branch,
+                ],
+                env=self.env,
             )
-            subprocess.call(
-                [
-                    'git',
-                    'submodule',
-                    'update',
-                    '--init',
-                    '--recursive',
-                    '--force',
-                ]
-            )
-
-        current_branch = subprocess.check_output(
-            ['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
-            text=True,
-        ).strip()
-        if current_branch != branch or force:
-            subprocess.check_call(['git', 'remote', 'update'])
-            branch_exists = False
-            try:
-                output = subprocess.check_output(['git', 'branch'], text=True)
-                branch_exists = branch in [
-                    b.strip('* \t\r\n') for b in output.splitlines()
-                ]
-            except subprocess.CalledProcessError:
-                pass
-
-            git_checkout = ['git', 'checkout']
-            if force:
-                git_checkout.append('--force')
-            if branch_exists:
-                git_checkout.append(branch)
-                subprocess.check_call(git_checkout)
-            elif self.git_remote_branch_exists(branch):
-                git_checkout.extend(
-                    [
-                        '-b',
-                        branch,
-                        f'{self.args.git_origin}/{branch}',
-                    ]
-                )
-                subprocess.check_call(git_checkout)
-
-        subprocess.check_call(['git', 'pull'])
-        subprocess.check_call(['git', 'submodule', 'update', '--init', '--recursive'])
+            subprocess.check_call(
+                ['git', 'reset', '--hard', '--quiet', 'FETCH_HEAD'], env=self.env
+            )
+        elif self.git_is_shallow():
+            # Keep local commits and edits; a diverged branch is an error.
+            subprocess.check_call(
+                ['git', 'fetch', '--no-tags', self.args.git_origin, branch],
+                env=self.env,
+            )
+            subprocess.check_call(
+                ['git', 'merge', '--ff-only', 'FETCH_HEAD'], env=self.env
+            )
+        else:
+            subprocess.check_call(['git', 'pull'], env=self.env)
+        self._git_cache.clear()
+        self.git_submodule_update()
 
     def sync_forward(self, force: bool = False) -> None:
         """Synchronize files forward from source directory to target directory."""
@@ -370,6 +562,103 @@ class RsyncMake:
                 self.user.sync_forward()
                 self.has_synced_forward = True
 
+    def rsync_parallel(self, src: str, dst: str, jobs: int) -> None:
+        """Run rsync as parallel workers over size-balanced buckets of files.
+
+        A dry run resolves the filters and the changed files, the workers copy
+        their buckets with `--files-from`, and a final serial pass applies
+        `--delete` and directory attributes. Many small files are streamed
+        through a single tar pipe instead, which avoids per-file round trips.
+        """
+        import heapq
+        import tempfile
+
+        worker_args = [x for x in self.rsync_args if x not in ('-v', '--delete')]
+        output = subprocess.check_output(
+            ['rsync', '--dry-run', '-8', '--out-format=%l %n', *worker_args, src, dst],
+            env=self.env,
+        )
+        files: List[Tuple[int, bytes]] = []
+        for line in output.splitlines():
+            size, _, name = line.partition(b' ')
+            # `-8` keeps non-ASCII names as they are, but rsync still escapes
+            # control characters such as newlines as `\#ooo`. Such names can't
+            # be passed back, so the final pass copies them.
+            if (
+                name
+                and not name.endswith(b'/')
+                and size.isdigit()
+                and b'\\#' not in name
+            ):
+                files.append((int(size), name))
+
+        sizes = sorted(size for size, _ in files)
+        if (
+            len(files) > self.TAR_MIN_FILES
+            and sizes[len(sizes) // 2] < self.TAR_MAX_MEDIAN_SIZE
+        ):
+            self.tar_copy(src, dst, [name for _, name in files])
+        elif len(files) > 1:
+            # Greedy packing: the largest file goes to the lightest bucket.
+            buckets: List[List[bytes]] = [[] for _ in range(min(jobs, len(files)))]
+            heap = [(0, i) for i in range(len(buckets))]
+            for size, name in sorted(files, reverse=True):
+                total, i = heapq.heappop(heap)
+                buckets[i].append(name)
+                heapq.heappush(heap, (total + size, i))
+
+            os.makedirs(dst, exist_ok=True)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                workers = []
+                for i, bucket in enumerate(buckets):
+                    files_from = os.path.join(tmp_dir, f'bucket{i}.txt')
+                    with open(files_from, 'wb') as fp:
+                        fp.write(b'\0'.join(bucket) + b'\0')
+                    workers.append(
+                        subprocess.Popen(
+                            [
+                                'rsync',
+                                *worker_args,
+                                f'--files-from={files_from}',
+                                '--from0',
+                                src,
+                                dst,
+                            ],
+                            env=self.env,
+                        )
+                    )
+                failed = [w for w in workers if w.wait() != 0]
+            if failed:
+                raise subprocess.CalledProcessError(
+                    failed[0].returncode, failed[0].args
+                )
+
+        rsync = ['rsync']
+        rsync.extend(self.rsync_args)
+        rsync.append(src)
+        rsync.append(dst)
+        subprocess.check_call(rsync, env=self.env)
+
+    def tar_copy(self, src: str, dst: str, names: List[bytes]) -> None:
+        """Stream the files relative to `src` into `dst` through one tar pipe."""
+        os.makedirs(dst, exist_ok=True)
+        create = subprocess.Popen(
+            ['tar', '-C', src, '--null', '-T', '-', '-cf', '-'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=self.env,
+        )
+        assert create.stdin is not None and create.stdout is not None
+        extract = subprocess.Popen(
+            ['tar', '-C', dst, '-xpf', '-'], stdin=create.stdout, env=self.env
+        )
+        create.stdout.close()
+        create.stdin.write(b'\0'.join(names) + b'\0')
+        create.stdin.close()
+        for proc in (create, extract):
+            if proc.wait() != 0:
+                raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
     def sync_backward(self) -> None:
         """Mark build outputs to sync backward later."""
         self.need_sync_backward = True
@@ -386,7 +675,7 @@ class RsyncMake:
         make.extend(self.args.make_options or [])
         make.append(target)
         make.extend(self.make_vars)
-        subprocess.check_call(make)
+        subprocess.check_call(make, env=self.env)
 
     @staticmethod
     def is_wsl2() -> bool:
@@ -398,30 +687,55 @@ class RsyncMake:
     @staticmethod
     def is_valid_file_name(file_name: str) -> bool:
         """Validate if file name is clean of prohibited characters."""
-        return re.match(r'^[^\\\/:*?\"<>|]{1,255}$', file_name) is not None
+        return _VALID_FILE_NAME_RE.match(file_name) is not None
 
     @staticmethod
     def get_workspace_dir(script_path: str) -> str:
         """Retrieve closest parent workspace directory with .git or config file."""
         workspace_dir = os.path.realpath(os.path.dirname(script_path))
+        marker_files = (
+            RsyncMake.RMAKE_USER,
+            RsyncMake.RMAKE_INCLUDES,
+            RsyncMake.RMAKE_EXCLUDES,
+        )
         current = workspace_dir
         while True:
-            for name in (
-                RsyncMake.RMAKE_USER,
-                RsyncMake.RMAKE_INCLUDES,
-                RsyncMake.RMAKE_EXCLUDES,
-            ):
-                if os.path.isfile(os.path.join(current, name)):
-                    return current
-            for name in ('.git',):
-                if os.path.isdir(os.path.join(current, name)):
-                    return current
+            # Stop at the first marker entry instead of indexing the directory.
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if (entry.name in marker_files and entry.is_file()) or (
+                            entry.name == '.git' and entry.is_dir()
+                        ):
+                            return current
+            except OSError:
+                pass
             parent = os.path.dirname(current)
             if current == parent:
                 break
             current = parent
         return workspace_dir
 
+    @staticmethod
+    def find_exec_command(takes_value: Set[str], args: List[str]) -> int:
+        """Return the index of the first positional `exec` in `args`, or -1.
+
+        `takes_value` holds the option strings that consume the next argument.
+        """
+        options_done = False
+        skip_value = False
+        for i, arg in enumerate(args):
+            if skip_value:
+                skip_value = False
+            elif options_done or not arg.startswith('-'):
+                if arg == 'exec':
+                    return i
+            elif arg == '--':
+                options_done = True
+            else:
+                skip_value = arg in takes_value
+        return -1
+
     @classmethod
     def main(cls, main_prog: str, args: Optional[List[str]] = None) -> int:
         """CLI main entry point for RsyncMake sync builder."""
@@ -438,6 +752,19 @@ class RsyncMake:
         try:
             from argparse import ArgumentParser, RawTextHelpFormatter
 
+            class Parser(ArgumentParser):
+                """Record the options that take a value, as they are added."""
+
+                def __init__(self, *args: Any, **kwargs: Any) -> None:
+                    super().__init__(*args, **kwargs)
+                    self.value_options: Set[str] = set()
+
+                def add_argument(self, *args: Any, **kwargs: Any) -> Any:
+                    action = super().add_argument(*args, **kwargs)
+                    if action.nargs != 0:
+                        self.value_options.update(action.option_strings)
+                    return action
+
             commands: List[str] = []
 
             def command_type(s: str) -> str:
@@ -450,7 +777,7 @@ class RsyncMake:
                 namespace.commands = commands
                 return namespace
 
-            parser = ArgumentParser(
+            parser = Parser(
                 prog=main_prog,
                 formatter_class=RawTextHelpFormatter,
                 description='WSL2 sync builder',
@@ -511,6 +838,20 @@ class RsyncMake:
                 dest='git_origin',
                 help='git origin name',
             )
+            parser.add_argument(
+                '--full-history',
+                action='store_true',
+                default=False,
+                dest='full_history',
+                help='clone the full git history instead of the latest commit',
+            )
+            parser.add_argument(
+                '--partial-clone',
+                action='store_true',
+                default=False,
+                dest='partial_clone',
+                help='with --full-history, download file contents on demand',
+            )
             parser.add_argument(
                 '-f',
                 '--force',
@@ -565,6 +906,15 @@ class RsyncMake:
                 dest='rsync_args',
                 help='rsync progress option',
             )
+            parser.add_argument(
+                '--rsync-jobs',
+                metavar='N',
+                action='store',
+                type=int,
+                default=1,
+                dest='rsync_jobs',
+                help='number of parallel rsync workers for forward sync',
+            )
             parser.add_argument(
                 '--skip-rsync',
                 action='store_true',
@@ -668,18 +1018,12 @@ class RsyncMake:
                 help='other custom commands',
             )
 
-            if 'exec' in cmd_args:
-                start = 0
-                while True:
-                    try:
-                        idx = cmd_args[start:].index('exec')
-                    except ValueError:
-                        break
-                    namespace = parse_args(cmd_args[: idx + 1])
-                    if 'exec' in namespace.commands:
-                        rmake.exec_cmd_args = cmd_args[idx + 1 :]
-                        return rmake._run(namespace)
-                    start = idx + 1
+            idx = cls.find_exec_command(parser.value_options, cmd_args)
+            if idx >= 0:
+                namespace = parse_args(cmd_args[: idx + 1])
+                if 'exec' in namespace.commands:
+                    rmake.exec_cmd_args = cmd_args[idx + 1 :]
+                    return rmake._run(namespace)
             return rmake._run(parse_args(cmd_args))
 
         except KeyboardInterrupt:
@@ -123,6 +123,10 @@ ANDROID_ABI_MAP: Dict[str, str] = {
     'riscv64gc': 'riscv64',
 }
 
+# NDK directory names: "26.1.10909125" (SDK manager) and "android-ndk-r21e" (legacy)
+NDK_VERSION_RE = re.compile(r'^(\d+)\.(\d+)\.(\d+)(?:\.\w+)?$')
+NDK_LEGACY_RE = re.compile(r'^android-ndk-r(\d+)([a-z]+)$')
+
 # Rust ARCH -> Apple ARCH
 APPLE_ARCH_MAP: Dict[str, str] = {
     'x86_64': 'x86_64',
@@ -434,35 +438,36 @@ def lock_file(path: Optional[str] = None, unlock: Optional[Any] = None) -> Any:
         dir_name = os.path.dirname(path)
         if dir_name and not os.path.isdir(dir_name):
             os.makedirs(dir_name, exist_ok=True)
-        f = open(path, 'a+')
+        # Read-write at offset 0; appending is of no use for a lock file.
+        f = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o666), 'r+')
     else:
         f = unlock
 
-    try:
-        # Posix based file locking (Linux, Ubuntu, MacOS, etc.)
-        import fcntl
+    if sys.platform == 'win32':
+        # Windows file locking, without retrying a failing `import fcntl` each call.
+        import msvcrt
 
+        # Always the first byte: a lock may extend past EOF, and the locked
+        # range no longer depends on the file size.
+        f.seek(0)
         if unlock is None:
-            fcntl.lockf(f, fcntl.LOCK_EX)  # pyright: ignore[reportAttributeAccessIssue]
+            msvcrt.locking(f.fileno(), msvcrt.LK_RLCK, 1)
             return f
         else:
-            fcntl.lockf(f, fcntl.LOCK_UN)  # pyright: ignore[reportAttributeAccessIssue]
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
             f.close()
             return None
-    except ModuleNotFoundError:
-        # Windows file locking
-        import msvcrt
 
-        def get_file_size(f_obj: Any) -> int:
-            return os.path.getsize(os.path.realpath(f_obj.name))
+    # Posix based file locking (Linux, Ubuntu, MacOS, etc.)
+    import fcntl
 
-        if unlock is None:
-            msvcrt.locking(f.fileno(), msvcrt.LK_RLCK, get_file_size(f))
-            return f
-        else:
-            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, get_file_size(f))
-            f.close()
-            return None
+    if unlock is None:
+        fcntl.lockf(f, fcntl.LOCK_EX)  # pyright: ignore[reportAttributeAccessIssue]
+        return f
+    else:
+        fcntl.lockf(f, fcntl.LOCK_UN)  # pyright: ignore[reportAttributeAccessIssue]
+        f.close()
+        return None
 
 
 def ndk_root(check_env: bool = False) -> str:
@@ -490,37 +495,30 @@ def ndk_root(check_env: bool = False) -> str:
         return ''
 
     try:
-        pattern1 = re.compile(r'^(\d+)\.(\d+)\.(\d+)(?:\.\w+)?$')
-        pattern2 = re.compile(r'^android-ndk-r(\d+)([a-z]+)$')
         ndk_dirs: List[Tuple[str, List[int]]] = []
-        for name in os.listdir(sdk_dir):
-            if not os.path.isfile(
-                os.path.join(sdk_dir, name, 'build', 'cmake', 'android.toolchain.cmake')
-            ):
-                continue
-            group = pattern1.match(name)
-            if group:
-                ndk_dirs.append((name, [int(group[1]), int(group[2]), int(group[3])]))
-                continue
-            group = pattern2.match(name)
+        with os.scandir(sdk_dir) as it:
+            entries = [entry for entry in it if entry.is_dir()]
+        for entry in entries:
+            name = entry.name
+            # Match the name first, only NDK-looking directories cost a stat.
+            group = NDK_VERSION_RE.match(name)
             if group:
-                ndk_dirs.append(
-                    (
-                        name,
-                        [
-                            int(group[1]),
-                            int(
-                                ''.join(
-                                    str(ord(x) + ord('0') - ord('a')) for x in group[2]
-                                )
-                            ),
-                            0,
-                        ],
-                    )
-                )
-                continue
+                version = [int(group[1]), int(group[2]), int(group[3])]
+            else:
+                group = NDK_LEGACY_RE.match(name)
+                if not group:
+                    continue
+                version = [
+                    int(group[1]),
+                    int(''.join(str(ord(x) + ord('0') - ord('a')) for x in group[2])),
+                    0,
+                ]
+            if os.path.isfile(
+                os.path.join(entry.path, 'build', 'cmake', 'android.toolchain.cmake')
+            ):
+                ndk_dirs.append((name, version))
         if ndk_dirs:
-            directory_name, _ = sorted(ndk_dirs, key=lambda x: x[1], reverse=True)[0]
+            directory_name, _ = max(ndk_dirs, key=lambda x: x[1])
             ndk_root_path = os.path.join(sdk_dir, directory_name).replace('\\', '/')
             if check_env:
                 os.environ['ANDROID_NDK_ROOT'] = ndk_root_path